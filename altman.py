@@ -1,17 +1,80 @@
-import pandas as pd
+from libraries import np, pd
 from risk_models import RiskModel
+from instrumentation import PERF
 
 
 class Altman(RiskModel):
-    """Altman Z-Score model implementation for listed companies."""
+    """Altman Z-Score model implementation for listed companies.
 
-    def __init__(self, companies):
-        """Initialize the Altman model with a financial data provider."""
-        super().__init__(companies)
+    Supports the original public-manufacturer Z, the private-firm Z',
+    the non-manufacturer Z'' and the emerging-market Z''-EM variants.
+    X4B is book equity over total liabilities, used in place of X4 by
+    Z' and Z''.
+    """
+
+    WEIGHTS = {"X1": 1.2, "X2": 1.4, "X3": 3.3, "X4": 0.6, "X5": 1.0}
+
+    COEFFICIENTS = pd.DataFrame(
+        {
+            "Z": [1.2, 1.4, 3.3, 0.6, 0.0, 1.0, 0.0],
+            "Z'": [0.717, 0.847, 3.107, 0.0, 0.420, 0.998, 0.0],
+            "Z''": [6.56, 3.26, 6.72, 0.0, 1.05, 0.0, 0.0],
+            "Z''-EM": [6.56, 3.26, 6.72, 0.0, 1.05, 0.0, 3.25],
+        },
+        index=["X1", "X2", "X3", "X4", "X4B", "X5", "Const"]
+    )
+
+    ZONES = pd.DataFrame(
+        {
+            "Distress": [1.8, 1.23, 1.1, 4.15],
+            "Safe": [3.0, 2.9, 2.6, 5.85],
+        },
+        index=COEFFICIENTS.columns
+    )
+
+    MANUFACTURING_SECTORS = {
+        "Industrials": "Z",
+        "Basic Materials": "Z",
+        "Energy": "Z",
+        "Consumer Cyclical": "Z",
+        "Consumer Defensive": "Z",
+    }
+
+    DEVELOPED_MARKETS = {
+        "United States", "Canada", "United Kingdom", "Germany", "France",
+        "Japan", "Switzerland", "Netherlands", "Australia", "Sweden",
+        "Ireland", "Denmark", "Norway", "Finland", "Belgium", "Austria",
+        "Italy", "Spain", "Portugal", "New Zealand", "Singapore",
+        "Hong Kong", "Israel", "Luxembourg",
+    }
+
+    def __init__(self, companies, variant="Z", cache=None):
+        """Initialize the Altman model with a financial data provider.
+
+        Args:
+            companies: Financial data provider.
+            variant: One of the ``COEFFICIENTS`` columns, or "auto" to pick
+                the variant per ticker from its sector and country.
+            cache: Optional ``ModelCache`` for memoized outputs.
+        """
+        super().__init__(companies, cache)
+
+        if variant != "auto" and variant not in self.COEFFICIENTS:
+            raise ValueError(f"Unknown Altman variant: {variant}")
+
+        self.variant = variant
 
     def _compute_ratios(self, ticker):
         """Compute the five Altman financial ratios for one ticker."""
 
+        return self._cached(
+            "ratios", ticker, (),
+            lambda: self._raw_ratios(ticker)
+        )
+
+    def _raw_ratios(self, ticker):
+        """Compute the five Altman ratios without memoization."""
+
         fs = self.companies
 
         X1 = fs.working_capital(ticker) / fs.total_assets(ticker)
@@ -22,49 +85,192 @@ class Altman(RiskModel):
 
         return X1, X2, X3, X4, X5
 
+    def _book_leverage(self, ticker):
+        """Return book equity over total liabilities (X4B) for one ticker."""
+
+        fs = self.companies
+
+        return self._cached(
+            "X4B", ticker, (),
+            lambda: fs.book_equity(ticker) / fs.total_liabilities(ticker)
+        )
+
+    @PERF.timed("altman.compute", per_ticker=True)
     def compute(self, ticker):
         """Return the Altman Z-Score for a single ticker."""
 
         try:
-            X1, X2, X3, X4, X5 = self._compute_ratios(ticker)
-
-            z = (
-                1.2 * X1 +
-                1.4 * X2 +
-                3.3 * X3 +
-                0.6 * X4 +
-                1.0 * X5
+            return self._cached(
+                "z", ticker, (self.variant,),
+                lambda: self._z_score(ticker)
             )
 
-            return z
-
         except Exception as e:
             print(f"⚠️ {ticker} skipped → {e}")
             return None
 
-    def ratios_matrix(self):
+    def _z_score(self, ticker):
+        """Combine the Altman ratios of one ticker into its Z-Score."""
+
+        X1, X2, X3, X4, X5 = self._compute_ratios(ticker)
+
+        variant = self.variant
+
+        if variant == "auto":
+            variant = self.variants([ticker])[0]
+
+        coef = self.COEFFICIENTS[variant]
+
+        x = {"X1": X1, "X2": X2, "X3": X3, "X4": X4, "X5": X5}
+
+        if coef["X4B"]:
+            x["X4B"] = self._book_leverage(ticker)
+
+        z = sum(coef[k] * v for k, v in x.items() if coef[k])
+
+        return z + coef["Const"]
+
+    def ratios_matrix(self, tickers=None):
         """Build a dataframe with Altman ratio components by ticker."""
 
         data = []
 
-        for ticker in self.companies.tickers:
+        if tickers is None:
+            tickers = self.companies.tickers
+
+        for ticker in tickers:
             try:
                 X1, X2, X3, X4, X5 = self._compute_ratios(ticker)
 
+                try:
+                    X4B = self._book_leverage(ticker)
+                except Exception:
+                    X4B = np.nan
+
                 data.append({
                     "Ticker": ticker,
                     "X1": X1,
                     "X2": X2,
                     "X3": X3,
                     "X4": X4,
+                    "X4B": X4B,
                     "X5": X5
                 })
 
             except Exception as e:
                 print(f"⚠️ Skipping {ticker}: {e}")
 
+        if not data:
+            return pd.DataFrame(
+                columns=["X1", "X2", "X3", "X4", "X4B", "X5"]
+            ).rename_axis("Ticker")
+
         return pd.DataFrame(data).set_index("Ticker")
 
+    @classmethod
+    def z_from_ratios(cls, ratios):
+        """Return Z-Scores for a dataframe with X1..X5 ratio columns."""
+
+        weights = pd.Series(cls.WEIGHTS)
+
+        return ratios[weights.index].dot(weights).rename("Z-Score")
+
+    @classmethod
+    def all_variants(cls, ratios):
+        """Score every ticker under every variant in one matrix product.
+
+        Args:
+            ratios: Ticker-indexed dataframe with X1..X5 and X4B columns.
+
+        Returns:
+            pandas.DataFrame: Tickers x variants. A variant is NaN for a
+            ticker when any ratio it uses is missing.
+        """
+
+        coef = cls.COEFFICIENTS
+        R = ratios.assign(Const=1.0).reindex(columns=coef.index)
+
+        values = R.to_numpy(dtype=float)
+        missing = np.isnan(values)
+
+        scores = np.where(missing, 0.0, values) @ coef.to_numpy()
+        unusable = missing.astype(float) @ (coef.to_numpy() != 0)
+
+        return pd.DataFrame(
+            np.where(unusable > 0, np.nan, scores),
+            index=ratios.index,
+            columns=coef.columns
+        )
+
+    def variants(self, tickers):
+        """Return the variant applied to each ticker.
+
+        With ``variant="auto"`` manufacturers (by sector) get Z, other
+        firms Z'' and firms outside developed markets Z''-EM.
+        """
+
+        if self.variant != "auto":
+            return np.full(len(tickers), self.variant, dtype=object)
+
+        meta = pd.DataFrame(
+            [self.companies.market_data.get(t) or {} for t in tickers],
+            index=tickers
+        ).reindex(columns=["sector", "country"])
+
+        variant = meta["sector"].map(self.MANUFACTURING_SECTORS)
+        variant = variant.fillna("Z''")
+
+        emerging = (
+            meta["country"].notna()
+            & ~meta["country"].isin(self.DEVELOPED_MARKETS)
+        )
+
+        return np.where(emerging, "Z''-EM", variant).astype(object)
+
+    @classmethod
+    def zone_thresholds(cls, variants):
+        """Return the distress and safe cutoffs of each variant.
+
+        Returns:
+            tuple: Arrays of distress and safe thresholds aligned with
+            ``variants``, usable as ``z_deny`` and ``z_approve`` in
+            ``RiskModel.credit_decisions``.
+        """
+
+        zones = cls.ZONES.reindex(np.asarray(variants, dtype=object))
+
+        return zones["Distress"].to_numpy(), zones["Safe"].to_numpy()
+
+    @classmethod
+    def score_zones(cls, z, variants):
+        """Classify Z-Scores into zones with each variant's own cutoffs."""
+
+        z = np.asarray(z, dtype=float)
+        distress, safe = cls.zone_thresholds(variants)
+
+        return np.select(
+            [z < distress, z < safe, ~np.isnan(z)],
+            ["Unsafe", "Grey", "Safe"],
+            default=None
+        )
+
+    @PERF.timed("altman.variant_scores_df")
+    def variant_scores_df(self):
+        """Return every variant score plus the selected Z-Score and zone."""
+
+        scores = self.all_variants(self.ratios_matrix())
+
+        variant = self.variants(list(scores.index))
+        col = scores.columns.get_indexer(variant)
+
+        z = scores.to_numpy()[np.arange(len(scores)), col]
+
+        scores["Variant"] = variant
+        scores["Z-Score"] = z
+        scores["Zone"] = self.score_zones(z, variant)
+
+        return scores
+
     def compute_all(self):
         """Compute Altman Z-Score values for all configured tickers."""
 
@@ -73,8 +279,17 @@ class Altman(RiskModel):
             for ticker in self.companies.tickers
         }
 
+    @PERF.timed("altman.z_scores_df")
     def z_scores_df(self):
-        """Return all computed Z-Scores as a ticker-indexed dataframe."""
+        """Return all computed Z-Scores as a ticker-indexed dataframe.
+
+        With ``variant="auto"`` the scores come from one vectorized
+        ``variant_scores_df`` pass and carry "Variant" and "Zone" columns,
+        since scores of different variants are not on the same scale.
+        """
+
+        if self.variant == "auto":
+            return self.variant_scores_df()[["Z-Score", "Variant", "Zone"]]
 
         results = self.compute_all()
 
@@ -0,0 +1,416 @@
+from libraries import np, pd
+from scipy.stats import rankdata
+from altman import Altman
+from merton import Merton
+from risk_models import RiskModel
+from instrumentation import PERF
+
+
+class Backtest:
+    """Evaluate Altman Z-Score and Merton PD against observed defaults.
+
+    Scores are rebuilt for a (date x ticker) panel from the point-in-time
+    fundamentals store and the price matrix in one vectorized pass, then
+    compared with a list of default events over a forward horizon.
+    """
+
+    DEBT_FIELDS = [
+        "Total Debt",
+        "Short Long Term Debt Total",
+        "Long Term Debt",
+    ]
+
+    SHARE_FIELDS = [
+        "Ordinary Shares Number",
+        "Share Issued",
+    ]
+
+    def __init__(self, companies, events, horizon_days=365, rf=0.03, T=1,
+                 vol_window=252):
+        """Initialize the backtest.
+
+        Args:
+            companies: ``Companies`` container with enough price history.
+            events: DataFrame with "Ticker" and "Date" columns listing
+                default (or credit event) dates.
+            horizon_days: Forward window in which an event counts as a hit.
+            rf: Risk-free rate used by the Merton model.
+            T: Merton horizon in years.
+            vol_window: Trading days in the rolling volatility window.
+        """
+
+        self.companies = companies
+        self.horizon_days = horizon_days
+        self.rf = rf
+        self.T = T
+        self.vol_window = vol_window
+
+        events = pd.DataFrame(events)
+        self.events = (
+            events.assign(
+                Ticker=events["Ticker"].str.upper(),
+                Date=pd.to_datetime(events["Date"])
+            )
+            .groupby("Ticker")["Date"]
+            .min()
+        )
+
+        self._panel = None
+
+    def _inputs(self, tickers, dates):
+        """Return the raw model inputs for each (ticker, date) pair."""
+
+        store = self.companies.fundamentals
+
+        def balance(field):
+            return store.asof(tickers, dates, field, "balance")
+
+        def income(field):
+            ttm = store.asof(tickers, dates, field, "income_ttm")
+            annual = store.asof(tickers, dates, field, "income")
+            return np.where(np.isnan(ttm), annual, ttm)
+
+        total_liabilities = balance("Total Liabilities Net Minority Interest")
+
+        debt = np.full(len(tickers), np.nan)
+        for field in self.DEBT_FIELDS:
+            debt = np.where(np.isnan(debt), balance(field), debt)
+        debt = np.where(np.isnan(debt), 0.5 * total_liabilities, debt)
+
+        return {
+            "Total Assets": balance("Total Assets"),
+            "Total Liabilities": total_liabilities,
+            "Working Capital": (
+                balance("Current Assets") - balance("Current Liabilities")
+            ),
+            "Retained Earnings": balance("Retained Earnings"),
+            "Total Debt": debt,
+            "EBIT": income("EBIT"),
+            "Sales": income("Total Revenue"),
+        }
+
+    def _market(self, tickers, dates):
+        """Return market equity and rolling volatility for each pair.
+
+        Market equity is the share count of the latest balance sheet
+        available at each date times the price on that date. Tickers
+        without a reported share count fall back to the current market
+        capitalization rescaled by the price ratio.
+        """
+
+        prices = self.companies.prices.reindex(
+            columns=self.companies.tickers
+        )
+
+        if prices.index.tz is not None:
+            prices = prices.tz_localize(None)
+
+        returns = np.log(prices / prices.shift(1))
+        vol = (
+            returns.rolling(self.vol_window, min_periods=20).std()
+            * np.sqrt(252)
+        )
+
+        rows = prices.index.searchsorted(dates, side="right") - 1
+        cols = prices.columns.get_indexer(tickers)
+
+        ok = (rows >= 0) & (cols >= 0)
+        r, c = np.clip(rows, 0, None), np.clip(cols, 0, None)
+
+        price = np.where(ok, prices.to_numpy()[r, c], np.nan)
+        sigma = np.where(ok, vol.to_numpy()[r, c], np.nan)
+
+        store = self.companies.fundamentals
+
+        shares = np.full(len(tickers), np.nan)
+        for field in self.SHARE_FIELDS:
+            shares = np.where(
+                np.isnan(shares),
+                store.asof(tickers, dates, field, "balance"),
+                shares
+            )
+
+        latest = prices.ffill().iloc[-1].to_numpy()[c]
+        market_cap = np.array([
+            (self.companies.market_data.get(t) or {}).get("market_cap")
+            or np.nan
+            for t in self.companies.tickers
+        ], dtype=float)[c]
+
+        equity = np.where(
+            np.isnan(shares),
+            market_cap * price / latest,
+            shares * price
+        )
+
+        return equity, sigma
+
+    @PERF.timed("backtest.panel")
+    def panel(self, dates=None):
+        """Score every ticker on every date and attach default labels.
+
+        Args:
+            dates: Evaluation dates; defaults to month ends of the price
+                history.
+
+        Returns:
+            pandas.DataFrame: Indexed by (Date, Ticker) with Z-Score,
+            Distance to Default, Probability of Default, Decision and
+            Default columns. Rows after a ticker's event are dropped.
+        """
+
+        tickers = self.companies.tickers
+
+        if dates is None:
+            index = self.companies.prices.index
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            dates = (
+                pd.Series(index, index=index)
+                .groupby(index.to_period("M"))
+                .max()
+            )
+
+        dates = pd.DatetimeIndex(dates)
+
+        pair_dates = dates.repeat(len(tickers))
+        pair_tickers = np.tile(np.asarray(tickers), len(dates))
+
+        x = self._inputs(pair_tickers, pair_dates)
+        equity, sigma = self._market(pair_tickers, pair_dates)
+
+        ratios = pd.DataFrame({
+            "X1": x["Working Capital"] / x["Total Assets"],
+            "X2": x["Retained Earnings"] / x["Total Assets"],
+            "X3": x["EBIT"] / x["Total Assets"],
+            "X4": equity / x["Total Liabilities"],
+            "X5": x["Sales"] / x["Total Assets"],
+        })
+
+        z = Altman.z_from_ratios(ratios).to_numpy()
+
+        debt = x["Total Debt"]
+        valid = (debt > 0) & (sigma > 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dd = np.where(
+                valid,
+                Merton.dd_from_inputs(
+                    equity + debt, debt, sigma, self.rf, self.T
+                ),
+                np.nan
+            )
+        pd_default = np.where(np.isnan(dd), np.nan, Merton.pd_from_dd(dd))
+
+        event = self.events.reindex(pair_tickers).to_numpy()
+        horizon = pair_dates + pd.Timedelta(days=self.horizon_days)
+
+        alive = ~(event <= pair_dates.to_numpy())
+        default = (event > pair_dates.to_numpy()) & (event <= horizon)
+
+        panel = pd.DataFrame(
+            {
+                "Z-Score": z,
+                "Distance to Default": dd,
+                "Probability of Default": pd_default,
+                "Decision": RiskModel.credit_decisions(z, pd_default),
+                "Default": default,
+            },
+            index=pd.MultiIndex.from_arrays(
+                [pair_dates, pair_tickers],
+                names=["Date", "Ticker"]
+            )
+        )
+
+        self._panel = panel[alive]
+
+        return self._panel
+
+    @property
+    def results(self):
+        """Return the last computed panel, scoring month ends if needed."""
+
+        if self._panel is None:
+            self.panel()
+
+        return self._panel
+
+    def _scored(self, score):
+        """Return (risk score, label) arrays where higher means riskier."""
+
+        df = self.results.dropna(subset=[score])
+
+        risk = df[score].to_numpy(dtype=float)
+
+        if score in ("Z-Score", "Distance to Default"):
+            risk = -risk
+
+        return risk, df["Default"].to_numpy(dtype=bool)
+
+    def auc(self, score="Probability of Default"):
+        """Return the ROC AUC of a score (Mann-Whitney rank formula)."""
+
+        risk, label = self._scored(score)
+
+        n_pos = label.sum()
+        n_neg = len(label) - n_pos
+
+        if n_pos == 0 or n_neg == 0:
+            return np.nan
+
+        ranks = rankdata(risk)
+
+        return (
+            ranks[label].sum() - n_pos * (n_pos + 1) / 2
+        ) / (n_pos * n_neg)
+
+    def accuracy_ratio(self, score="Probability of Default"):
+        """Return the accuracy ratio (Gini), 2 * AUC - 1."""
+        return 2 * self.auc(score) - 1
+
+    def roc(self, score="Probability of Default"):
+        """Return the ROC curve as a dataframe of FPR, TPR and thresholds."""
+
+        risk, label = self._scored(score)
+
+        order = np.argsort(-risk, kind="mergesort")
+        risk, label = risk[order], label[order]
+
+        last = np.r_[np.flatnonzero(np.diff(risk)), len(risk) - 1]
+
+        tp = np.cumsum(label)[last]
+        fp = np.cumsum(~label)[last]
+
+        threshold = risk[last]
+        if score in ("Z-Score", "Distance to Default"):
+            threshold = -threshold
+
+        return pd.DataFrame({
+            "Threshold": np.r_[np.nan, threshold],
+            "FPR": np.r_[0, fp / max(fp[-1], 1)],
+            "TPR": np.r_[0, tp / max(tp[-1], 1)],
+        })
+
+    def calibration(self, bins=10):
+        """Compare predicted PD with realized default rates by PD quantile.
+
+        Returns:
+            pandas.DataFrame: Mean predicted PD and observed default rate
+            (both in percent) with the observation count per bucket.
+        """
+
+        df = self.results.dropna(subset=["Probability of Default"])
+
+        bucket = pd.qcut(
+            df["Probability of Default"].rank(method="first"),
+            bins,
+            labels=False
+        )
+
+        return (
+            df.groupby(bucket)
+            .agg(
+                Predicted=("Probability of Default", "mean"),
+                Observed=("Default", "mean"),
+                Count=("Default", "size"),
+            )
+            .assign(Observed=lambda x: x["Observed"] * 100)
+            .rename_axis("Bucket")
+        )
+
+    def threshold_sweep(self, z_deny=None, pd_deny=None, z_approve=None,
+                        pd_approve=None):
+        """Evaluate ``credit_decisions`` over a grid of thresholds.
+
+        Each argument is a list of candidate values; omitted arguments keep
+        the ``RiskModel`` default.
+
+        Returns:
+            pandas.DataFrame: One row per threshold combination with the
+            share of the panel denied/approved, the share of defaulters
+            denied (hit rate) and default rates among approved and denied.
+        """
+
+        df = self.results.dropna(
+            subset=["Z-Score", "Probability of Default"]
+        )
+
+        z = df["Z-Score"].to_numpy()
+        p = df["Probability of Default"].to_numpy()
+        label = df["Default"].to_numpy(dtype=bool)
+
+        grid = pd.MultiIndex.from_product(
+            [
+                z_deny or [RiskModel.Z_DENY],
+                pd_deny or [RiskModel.PD_DENY],
+                z_approve or [RiskModel.Z_APPROVE],
+                pd_approve or [RiskModel.PD_APPROVE],
+            ],
+            names=["Z Deny", "PD Deny", "Z Approve", "PD Approve"]
+        )
+
+        rows = []
+
+        for zd, pdd, za, pda in grid:
+
+            decision = RiskModel.credit_decisions(
+                z, p, z_approve=za, pd_approve=pda, z_deny=zd, pd_deny=pdd
+            )
+
+            deny = decision == "DENY"
+            approve = decision == "APPROVE"
+
+            rows.append({
+                "Deny Rate": deny.mean(),
+                "Approve Rate": approve.mean(),
+                "Hit Rate": deny[label].mean() if label.any() else np.nan,
+                "Default Rate Approved": (
+                    label[approve].mean() if approve.any() else np.nan
+                ),
+                "Default Rate Denied": (
+                    label[deny].mean() if deny.any() else np.nan
+                ),
+            })
+
+        return pd.DataFrame(rows, index=grid)
+
+    def unscored_events(self, score="Probability of Default"):
+        """Return the defaulters that never received a score.
+
+        These are event tickers labelled as defaults somewhere in the panel
+        whose score is missing on every one of those rows, so ``auc`` and
+        the other metrics cannot see them.
+        """
+
+        defaults = self.results[self.results["Default"]]
+        tickers = defaults.index.get_level_values("Ticker")
+
+        scored = defaults[score].notna().groupby(tickers).any()
+
+        return scored.index[~scored].tolist()
+
+    def summary(self):
+        """Return AUC, accuracy ratio and unscored defaulters per score."""
+
+        scores = [
+            "Z-Score",
+            "Distance to Default",
+            "Probability of Default",
+        ]
+
+        unscored = [len(self.unscored_events(s)) for s in scores]
+
+        if any(unscored):
+            print(
+                f"Warning: {max(unscored)} defaulting tickers have no "
+                "score and are left out of the metrics"
+            )
+
+        return pd.DataFrame(
+            {
+                "AUC": [self.auc(s) for s in scores],
+                "Accuracy Ratio": [self.accuracy_ratio(s) for s in scores],
+                "Unscored Events": unscored,
+            },
+            index=scores
+        )
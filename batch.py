@@ -0,0 +1,90 @@
+import argparse
+import json
+import logging
+
+from altman import Altman
+from merton import Merton
+from financial_statements import Companies
+from visualization import Visualization
+from instrumentation import PERF
+
+
+def run(tickers, interval="1y", rf=0.03):
+    """
+    Runs both risk models for a ticker list without the dashboard.
+
+    Parameters
+    ----------
+    tickers : list of str
+        Company ticker symbols.
+    interval : str
+        Historical price interval.
+    rf : float
+        Risk-free rate used by the Merton model.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Credit decision table.
+    """
+
+    companies = Companies(tickers, interval)
+
+    with PERF.stage("batch.altman"):
+        z_df = Altman(companies).z_scores_df().dropna()
+
+    with PERF.stage("batch.merton"):
+        merton_df = Merton(companies, rf=rf).merton_df().dropna()
+
+    with PERF.stage("batch.credit_table"):
+        return Visualization.build_credit_table(z_df, merton_df)
+
+
+def main():
+    """
+    Command line entry point for batch runs.
+
+    Writes the credit decision table as CSV and, optionally,
+    a JSON performance report with stage timings, remote call
+    counters, cache hit rates and cProfile output.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Batch credit risk evaluation"
+    )
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--interval", default="1y")
+    parser.add_argument("--rf", type=float, default=0.03)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--report", default=None)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--log-level", default="WARNING")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(message)s"
+    )
+
+    if args.profile:
+        PERF.start_profile()
+
+    credit_df = run(args.tickers, args.interval, args.rf)
+
+    if args.profile:
+        PERF.stop_profile()
+
+    if args.output:
+        credit_df.to_csv(args.output, index=False)
+    else:
+        print(credit_df.to_string(index=False))
+
+    if args.report:
+        PERF.write_report(args.report)
+    else:
+        print(json.dumps(PERF.report()["stages"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+from libraries import np, pd, fcluster, linkage
+from instrumentation import PERF
+
+
+class CovarianceEngine:
+    """Blockwise covariance and correlation of log-returns across tickers.
+
+    Products are accumulated one (block x block) tile at a time into a
+    preallocated matrix of ``dtype``, so a 5k x 5k float32 matrix needs
+    about 100 MB and no (tickers x tickers) temporaries. Missing returns
+    are treated as zero after demeaning for the sample and Ledoit-Wolf
+    estimates; the EWMA estimate assumes zero-mean returns (RiskMetrics)
+    both when it is built and when new bars are folded in.
+    """
+
+    def __init__(self, returns, dtype=np.float32, block_size=1024):
+        """Initialize the engine.
+
+        Args:
+            returns: Dataframe of log-returns (dates x tickers).
+            dtype: Float type of the output matrices.
+            block_size: Number of tickers per tile.
+        """
+
+        self.tickers = pd.Index(returns.columns)
+        self.dtype = dtype
+        self.block_size = block_size
+
+        raw = returns.to_numpy(dtype=dtype)
+
+        X = raw - np.nanmean(raw, axis=0)
+        X[np.isnan(X)] = 0
+        raw[np.isnan(raw)] = 0
+
+        self._X = X
+        self._raw = raw
+        self._ewma = None
+        self._lam = None
+
+    @classmethod
+    def from_companies(cls, companies, **kwargs):
+        """Build an engine from ``Companies.log_returns``."""
+        return cls(companies.log_returns, **kwargs)
+
+    def _blocks(self):
+        """Yield (start, stop) ticker ranges of one tile side."""
+
+        n = len(self.tickers)
+
+        for start in range(0, n, self.block_size):
+            yield start, min(start + self.block_size, n)
+
+    def _gram(self, X, scale):
+        """Return ``scale * X.T @ X`` built tile by tile (symmetric)."""
+
+        n = X.shape[1]
+        out = np.empty((n, n), dtype=self.dtype)
+
+        blocks = list(self._blocks())
+
+        for a, (i0, i1) in enumerate(blocks):
+            for j0, j1 in blocks[a:]:
+                tile = (X[:, i0:i1].T @ X[:, j0:j1]) * scale
+                out[i0:i1, j0:j1] = tile
+                out[j0:j1, i0:i1] = tile.T
+
+        return out
+
+    def _frame(self, matrix):
+        """Wrap a matrix with ticker labels."""
+        return pd.DataFrame(matrix, index=self.tickers, columns=self.tickers)
+
+    @PERF.timed("correlation.sample_cov")
+    def sample_cov(self):
+        """Return the sample covariance matrix."""
+
+        n = max(len(self._X) - 1, 1)
+
+        return self._frame(self._gram(self._X, 1 / n))
+
+    @PERF.timed("correlation.ledoit_wolf")
+    def ledoit_wolf(self):
+        """Return the Ledoit-Wolf shrunk covariance and the shrinkage.
+
+        Shrinks the sample covariance towards a scaled identity with the
+        intensity estimated as in Ledoit and Wolf (2004). The statistics
+        the estimator needs are accumulated tile by tile alongside the
+        covariance itself.
+
+        Returns:
+            tuple: (covariance dataframe, shrinkage intensity in [0, 1]).
+        """
+
+        X = self._X
+        n_samples, n_features = X.shape
+
+        X2 = X**2
+        trace = X2.sum(axis=0, dtype=np.float64) / n_samples
+        mu = trace.sum() / n_features
+
+        cov = np.empty((n_features, n_features), dtype=self.dtype)
+
+        beta_ = 0.0
+        delta_ = 0.0
+
+        blocks = list(self._blocks())
+
+        for a, (i0, i1) in enumerate(blocks):
+            for j0, j1 in blocks[a:]:
+                weight = 1 if i0 == j0 else 2
+
+                tile = (X[:, i0:i1].T @ X[:, j0:j1]) / n_samples
+                cov[i0:i1, j0:j1] = tile
+                cov[j0:j1, i0:i1] = tile.T
+
+                delta_ += weight * np.sum(tile.astype(np.float64)**2)
+                beta_ += weight * np.sum(
+                    X2[:, i0:i1].T @ X2[:, j0:j1],
+                    dtype=np.float64
+                )
+
+        beta = (beta_ / n_samples - delta_) / (n_features * n_samples)
+        delta = (
+            delta_ - 2 * mu * trace.sum() + n_features * mu**2
+        ) / n_features
+
+        beta = min(beta, delta)
+        shrinkage = 0.0 if beta == 0 else beta / delta
+
+        cov *= 1 - shrinkage
+        cov[np.diag_indices(n_features)] += shrinkage * mu
+
+        return self._frame(cov), shrinkage
+
+    @PERF.timed("correlation.ewma")
+    def ewma(self, lam=0.94):
+        """Return the RiskMetrics-style EWMA covariance.
+
+        Returns are taken as zero-mean, the most recent one has weight
+        ``1 - lam`` and weights decay geometrically into the past. The
+        state is kept for ``update``; the returned frame is a copy.
+        """
+
+        n = len(self._raw)
+        weights = (1 - lam) * lam ** np.arange(n - 1, -1, -1)
+
+        Xw = self._raw * np.sqrt(weights, dtype=self.dtype)[:, None]
+
+        self._ewma = self._gram(Xw, 1)
+        self._lam = lam
+
+        return self._frame(self._ewma.copy())
+
+    def update(self, returns):
+        """Fold new bars into the EWMA covariance in place.
+
+        Only the EWMA state moves; sample and Ledoit-Wolf estimates keep
+        using the returns the engine was built with.
+
+        Args:
+            returns: Dataframe or series of new log-returns; missing
+                tickers count as zero.
+
+        Returns:
+            pandas.DataFrame: A copy of the updated EWMA covariance.
+        """
+
+        if self._ewma is None:
+            self.ewma()
+
+        if isinstance(returns, pd.Series):
+            returns = returns.to_frame().T
+
+        bars = returns.reindex(columns=self.tickers).to_numpy(self.dtype)
+        bars[np.isnan(bars)] = 0
+
+        lam = self._lam
+
+        for r in bars:
+            for i0, i1 in self._blocks():
+                self._ewma[i0:i1] *= lam
+                self._ewma[i0:i1] += (1 - lam) * np.outer(r[i0:i1], r)
+
+        return self._frame(self._ewma.copy())
+
+    def correlation(self, method="ledoit_wolf", **kwargs):
+        """Return a correlation matrix from one of the estimators.
+
+        Args:
+            method: "sample", "ledoit_wolf" or "ewma".
+        """
+
+        if method == "sample":
+            cov = self.sample_cov()
+        elif method == "ledoit_wolf":
+            cov, _ = self.ledoit_wolf()
+        elif method == "ewma":
+            cov = self.ewma(**kwargs)
+        else:
+            raise ValueError(f"Unknown covariance method: {method}")
+
+        # Every estimator returns a fresh matrix, so it can be normalized
+        # without another copy.
+        return self.corr_from_cov(cov, self.block_size, inplace=True)
+
+    @staticmethod
+    def corr_from_cov(cov, block_size=1024, inplace=False):
+        """Normalize a covariance dataframe to a correlation.
+
+        Args:
+            cov: Covariance dataframe.
+            block_size: Rows normalized per step.
+            inplace: Overwrite the values of ``cov`` instead of copying
+                them; only safe when nothing else shares the matrix.
+        """
+
+        matrix = cov.to_numpy(copy=not inplace)
+        std = np.sqrt(np.diag(matrix)).astype(matrix.dtype)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv = np.where(std > 0, 1 / std, 0).astype(matrix.dtype)
+
+        for start in range(0, len(matrix), block_size):
+            stop = start + block_size
+            matrix[start:stop] *= inv[start:stop, None]
+            matrix[start:stop] *= inv[None, :]
+
+        np.fill_diagonal(matrix, np.where(std > 0, 1, np.nan))
+
+        return pd.DataFrame(matrix, index=cov.index, columns=cov.columns)
+
+    @staticmethod
+    @PERF.timed("correlation.risk_groups")
+    def risk_groups(corr, threshold=0.5, n_groups=None, method="average"):
+        """Cluster names into correlated risk groups.
+
+        Uses hierarchical clustering on the correlation distance
+        ``sqrt((1 - rho) / 2)``. The condensed distance vector scipy needs
+        is filled row by row from the upper triangle of ``corr`` and
+        transformed in place, so no dense (tickers x tickers) copy is
+        made.
+
+        Args:
+            corr: Correlation dataframe.
+            threshold: Minimum correlation linking names into one group
+                (ignored when ``n_groups`` is given).
+            n_groups: Exact number of groups to form.
+            method: Linkage method passed to scipy.
+
+        Returns:
+            pandas.Series: Group id per ticker, largest group first.
+        """
+
+        rho = corr.to_numpy()
+        n = len(rho)
+
+        distance = np.empty(n * (n - 1) // 2, dtype=np.float64)
+
+        start = 0
+        for i in range(n - 1):
+            stop = start + n - 1 - i
+            distance[start:stop] = rho[i, i + 1:]
+            start = stop
+
+        np.nan_to_num(distance, copy=False)
+        np.subtract(1, distance, out=distance)
+        distance *= 0.5
+        np.clip(distance, 0, 1, out=distance)
+        np.sqrt(distance, out=distance)
+
+        tree = linkage(distance, method=method)
+
+        if n_groups is not None:
+            labels = fcluster(tree, n_groups, criterion="maxclust")
+        else:
+            labels = fcluster(
+                tree,
+                np.sqrt((1 - threshold) / 2),
+                criterion="distance"
+            )
+
+        labels = pd.Series(labels, index=corr.index, name="Risk Group")
+
+        order = labels.value_counts().index
+        relabel = pd.Series(np.arange(1, len(order) + 1), index=order)
+
+        return labels.map(relabel)
+
+    @staticmethod
+    def group_summary(corr, groups):
+        """Return size and mean intra-group correlation of each group."""
+
+        rows = []
+
+        for group, members in groups.groupby(groups):
+            idx = corr.index.get_indexer(members.index)
+            block = corr.to_numpy()[np.ix_(idx, idx)]
+            n = len(idx)
+
+            rows.append({
+                "Risk Group": group,
+                "Size": n,
+                "Mean Correlation": (
+                    (np.nansum(block) - n) / (n * (n - 1)) if n > 1
+                    else np.nan
+                ),
+                "Members": ", ".join(members.index[:10]),
+            })
+
+        return pd.DataFrame(rows).set_index("Risk Group")
@@ -1,20 +1,33 @@
-from libraries import pd, yf
+import json
+import os
+import re
 
+from libraries import pd, yf, np
+from instrumentation import PERF
 
-def download_prices(tickers, interval):
-    """Download adjusted close prices for a ticker list and interval."""
+
+@PERF.timed("download_prices")
+def download_prices(tickers, interval, provider=yf):
+    """Download adjusted close prices for a ticker list and interval.
+
+    ``provider`` is any object exposing a yfinance-style ``Ticker`` class,
+    such as the ``yfinance`` module itself or a ``LocalProvider``.
+    """
 
     prices = {}
 
     for ticker in tickers:
 
         try:
-            stock = yf.Ticker(ticker)
+            stock = provider.Ticker(ticker)
 
-            data = stock.history(
-                period=interval,
-                auto_adjust=True
-            )
+            with PERF.stage("fetch.history", ticker):
+                data = stock.history(
+                    period=interval,
+                    auto_adjust=True
+                )
+
+            PERF.remote_call("history", data)
 
             if data is None or data.empty:
                 print(f"{ticker} history empty")
@@ -31,3 +44,210 @@ def download_prices(tickers, interval):
 
     return pd.DataFrame(prices)
 
+
+class LocalProvider:
+    """Offline data provider with the same interface as ``yfinance``.
+
+    Reads one directory per ticker under ``root``::
+
+        root/AZO/history.csv              Date, Close
+        root/AZO/financials.csv           annual income statement
+        root/AZO/quarterly_financials.csv quarterly income statement
+        root/AZO/balance_sheet.csv        annual balance sheet
+        root/AZO/info.json                marketCap, sector, ...
+
+    Statements are stored like yfinance returns them: line items as rows
+    and period-end dates as columns.
+    """
+
+    STATEMENTS = ["financials", "quarterly_financials", "balance_sheet"]
+
+    def __init__(self, root):
+        """Initialize the provider over a data directory."""
+        self.root = root
+
+    def Ticker(self, ticker):
+        """Return a yfinance-compatible ticker backed by local files."""
+        return LocalTicker(os.path.join(self.root, ticker.upper()))
+
+    def tickers(self):
+        """Return all ticker symbols available under ``root``."""
+
+        if not os.path.isdir(self.root):
+            return []
+
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    @classmethod
+    def export(cls, tickers, root, period="5y", provider=yf):
+        """Snapshot data for ``tickers`` from ``provider`` into ``root``."""
+
+        for t in tickers:
+            source = provider.Ticker(t)
+            path = os.path.join(root, t.upper())
+            os.makedirs(path, exist_ok=True)
+
+            history = source.history(period=period, auto_adjust=True)
+            history[["Close"]].to_csv(os.path.join(path, "history.csv"))
+
+            for name in cls.STATEMENTS:
+                statement = getattr(source, name)
+                if statement is not None and not statement.empty:
+                    statement.to_csv(os.path.join(path, f"{name}.csv"))
+
+            with open(os.path.join(path, "info.json"), "w") as f:
+                json.dump(source.info, f, default=str)
+
+    @classmethod
+    def generate_synthetic(cls, root, n_tickers=100, years=5, seed=0):
+        """Write a reproducible synthetic universe, e.g. for load tests."""
+
+        rng = np.random.default_rng(seed)
+
+        dates = pd.bdate_range(
+            end=pd.Timestamp.today().normalize(),
+            periods=252 * years
+        )
+        annual = pd.DatetimeIndex([
+            pd.Timestamp(year=dates[-1].year - k - 1, month=12, day=31)
+            for k in range(min(years, 4))
+        ])
+        quarterly = pd.date_range(
+            end=dates[-1], periods=5, freq="QE"
+        )[::-1]
+
+        sectors = [
+            "Industrials", "Technology", "Consumer Cyclical",
+            "Healthcare", "Utilities", "Energy",
+        ]
+
+        tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+
+        for i, t in enumerate(tickers):
+            path = os.path.join(root, t)
+            os.makedirs(path, exist_ok=True)
+
+            vol = rng.uniform(0.15, 0.8) / np.sqrt(252)
+            close = 50 * np.exp(np.cumsum(rng.normal(0, vol, len(dates))))
+            pd.DataFrame({"Close": close}, index=dates) \
+                .rename_axis("Date") \
+                .to_csv(os.path.join(path, "history.csv"))
+
+            assets = rng.uniform(1e9, 5e10) * rng.uniform(0.9, 1.1, 4)
+            liabilities = assets * rng.uniform(0.3, 0.95)
+
+            pd.DataFrame(
+                {
+                    "Total Assets": assets,
+                    "Total Liabilities Net Minority Interest": liabilities,
+                    "Current Assets": assets * rng.uniform(0.2, 0.5),
+                    "Current Liabilities": assets * rng.uniform(0.1, 0.4),
+                    "Retained Earnings": assets * rng.uniform(-0.2, 0.5),
+                    "Total Debt": liabilities * rng.uniform(0.2, 0.8),
+                    "Stockholders Equity": assets - liabilities,
+                    "Ordinary Shares Number": np.full(4, assets[0] / 100),
+                },
+                index=annual[:len(assets)]
+            ).T.to_csv(os.path.join(path, "balance_sheet.csv"))
+
+            revenue = assets[0] * rng.uniform(0.3, 1.5)
+
+            pd.DataFrame(
+                {
+                    "Total Revenue": revenue * rng.uniform(0.9, 1.1, 4),
+                    "EBIT": revenue * rng.uniform(-0.05, 0.25, 4),
+                },
+                index=annual
+            ).T.to_csv(os.path.join(path, "financials.csv"))
+
+            pd.DataFrame(
+                {
+                    "Total Revenue": revenue / 4 * rng.uniform(0.9, 1.1, 5),
+                    "EBIT": revenue / 4 * rng.uniform(-0.05, 0.25, 5),
+                },
+                index=quarterly
+            ).T.to_csv(os.path.join(path, "quarterly_financials.csv"))
+
+            with open(os.path.join(path, "info.json"), "w") as f:
+                json.dump({
+                    "marketCap": float(close[-1] * assets[0] / 100),
+                    "sector": sectors[i % len(sectors)],
+                    "industry": f"{sectors[i % len(sectors)]} {i % 5}",
+                    "country": "United States",
+                }, f)
+
+        return tickers
+
+
+class LocalTicker:
+    """yfinance ``Ticker`` look-alike reading one ticker directory."""
+
+    def __init__(self, path):
+        """Initialize the ticker over its data directory."""
+        self.path = path
+
+    def _statement(self, name):
+        """Read a statement CSV with period-end dates as columns."""
+
+        file = os.path.join(self.path, f"{name}.csv")
+
+        if not os.path.exists(file):
+            return pd.DataFrame()
+
+        df = pd.read_csv(file, index_col=0)
+        df.columns = pd.to_datetime(df.columns)
+
+        return df
+
+    def history(self, period="1y", auto_adjust=True):
+        """Return the stored price history trimmed to ``period``."""
+
+        file = os.path.join(self.path, "history.csv")
+
+        if not os.path.exists(file):
+            return pd.DataFrame()
+
+        data = pd.read_csv(file, index_col=0, parse_dates=True)
+
+        match = re.fullmatch(r"(\d+)(d|mo|y)", period or "")
+
+        if match and not data.empty:
+            n, unit = int(match.group(1)), match.group(2)
+            offset = {
+                "d": pd.DateOffset(days=n),
+                "mo": pd.DateOffset(months=n),
+                "y": pd.DateOffset(years=n),
+            }[unit]
+            data = data[data.index > data.index[-1] - offset]
+
+        return data
+
+    @property
+    def financials(self):
+        """Return the annual income statement."""
+        return self._statement("financials")
+
+    @property
+    def quarterly_financials(self):
+        """Return the quarterly income statement."""
+        return self._statement("quarterly_financials")
+
+    @property
+    def balance_sheet(self):
+        """Return the annual balance sheet."""
+        return self._statement("balance_sheet")
+
+    @property
+    def info(self):
+        """Return stored market metadata."""
+
+        file = os.path.join(self.path, "info.json")
+
+        if not os.path.exists(file):
+            return {}
+
+        with open(file) as f:
+            return json.load(f)
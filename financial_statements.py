@@ -1,26 +1,65 @@
 from libraries import pd, yf, np
 from data_processing import download_prices
+from point_in_time import FundamentalsStore
+from model_cache import ModelCache
+from instrumentation import PERF
 
 
 class Companies:
     """Container that downloads, caches, and serves company financial data."""
 
-    def __init__(self, tickers, interval="1y"):
-        """Initialize the data container for the provided ticker symbols."""
+    def __init__(self, tickers, interval="1y", provider=yf, cache_size=None):
+        """Initialize the data container for the provided ticker symbols.
+
+        ``provider`` defaults to Yahoo Finance; pass a ``LocalProvider`` to
+        run offline against files on disk. ``cache_size`` bounds the shared
+        model output cache and defaults to a size that holds every output
+        of the universe.
+        """
 
         self.tickers = [t.upper() for t in tickers]
         self.interval = interval
+        self.provider = provider
 
         self._prices = None
+        self._log_returns = None
         self._income_stmt = {}
+        self._quarterly_income = {}
         self._balance_sheet = {}
         self._market_data = {}
+        self._fundamentals = None
 
         self._yf = {
-            t: yf.Ticker(t)
+            t: provider.Ticker(t)
             for t in self.tickers
         }
 
+        self.data_version = 0
+        self.model_cache = (
+            ModelCache(cache_size) if cache_size
+            else ModelCache.for_tickers(len(self.tickers))
+        )
+
+        PERF.register_cache("model_cache", self.model_cache)
+
+    def refresh(self):
+        """Drop all cached data so the next access downloads it again.
+
+        Bumps ``data_version`` and clears the shared model output cache so
+        memoized ratios, Z-Scores, DD and PD are recomputed.
+        """
+
+        self._prices = None
+        self._log_returns = None
+        self._income_stmt = {}
+        self._quarterly_income = {}
+        self._balance_sheet = {}
+        self._market_data = {}
+        self._fundamentals = None
+
+        self.data_version += 1
+        self.model_cache.invalidate()
+
     @property
     def prices(self):
         """Return cached adjusted close prices for all configured tickers."""
@@ -29,7 +68,8 @@ class Companies:
 
             prices = download_prices(
                 self.tickers,
-                self.interval
+                self.interval,
+                self.provider
             )
 
             if prices.empty:
@@ -45,28 +85,35 @@ class Companies:
 
         if not self._income_stmt:
 
-            for t in self.tickers:
-                try:
-                    ticker = self._yf[t]
+            with PERF.stage("companies.income_statements"):
+                for t in self.tickers:
+                    try:
+                        ticker = self._yf[t]
 
-                    annual = ticker.financials
-                    quarterly = ticker.quarterly_financials
+                        with PERF.stage("fetch.income", t):
+                            annual = ticker.financials
+                            quarterly = ticker.quarterly_financials
 
-                    if annual is None or annual.empty:
-                        self._income_stmt[t] = None
-                        continue
+                        PERF.remote_call("financials", annual)
+                        PERF.remote_call("quarterly_financials", quarterly)
 
-                    if quarterly is not None and not quarterly.empty:
-                        ttm = quarterly.iloc[:, :4].sum(axis=1)
-                        ttm = pd.DataFrame(ttm, columns=["TTM"])
-                        income = pd.concat([ttm, annual], axis=1)
-                    else:
-                        income = annual
+                        if annual is None or annual.empty:
+                            self._income_stmt[t] = None
+                            continue
+
+                        self._quarterly_income[t] = quarterly
 
-                    self._income_stmt[t] = income
+                        if quarterly is not None and not quarterly.empty:
+                            ttm = quarterly.iloc[:, :4].sum(axis=1)
+                            ttm = pd.DataFrame(ttm, columns=["TTM"])
+                            income = pd.concat([ttm, annual], axis=1)
+                        else:
+                            income = annual
 
-                except Exception:
-                    self._income_stmt[t] = None
+                        self._income_stmt[t] = income
+
+                    except Exception:
+                        self._income_stmt[t] = None
 
         return self._income_stmt
 
@@ -76,20 +123,24 @@ class Companies:
 
         if not self._balance_sheet:
 
-            for t in self.tickers:
+            with PERF.stage("companies.balance_sheets"):
+                for t in self.tickers:
 
-                try:
-                    ticker = self._yf[t]
+                    try:
+                        ticker = self._yf[t]
 
-                    bs = ticker.balance_sheet
+                        with PERF.stage("fetch.balance", t):
+                            bs = ticker.balance_sheet
 
-                    if bs is None or bs.empty:
-                        bs = None
+                        PERF.remote_call("balance_sheet", bs)
 
-                    self._balance_sheet[t] = bs
+                        if bs is None or bs.empty:
+                            bs = None
 
-                except Exception:
-                    self._balance_sheet[t] = None
+                        self._balance_sheet[t] = bs
+
+                    except Exception:
+                        self._balance_sheet[t] = None
 
         return self._balance_sheet
 
@@ -99,20 +150,65 @@ class Companies:
 
         if not self._market_data:
 
-            for t in self.tickers:
+            with PERF.stage("companies.market_data"):
+                for t in self.tickers:
+
+                    try:
+                        with PERF.stage("fetch.info", t):
+                            info = self._yf[t].info
 
-                try:
-                    info = self._yf[t].info
+                        PERF.remote_call("info", info)
 
-                    self._market_data[t] = {
-                        "market_cap": info.get("marketCap"),
-                    }
+                        self._market_data[t] = {
+                            "market_cap": info.get("marketCap"),
+                            "sector": info.get("sector"),
+                            "industry": info.get("industry"),
+                            "country": info.get("country"),
+                        }
 
-                except Exception:
-                    self._market_data[t] = None
+                    except Exception:
+                        self._market_data[t] = None
 
         return self._market_data
 
+    @property
+    def fundamentals(self):
+        """Return a point-in-time store built from all cached statements."""
+
+        if self._fundamentals is None:
+
+            with PERF.stage("companies.fundamentals"):
+                store = FundamentalsStore()
+                annual_lag = FundamentalsStore.ANNUAL_LAG_DAYS
+                quarterly_lag = FundamentalsStore.QUARTERLY_LAG_DAYS
+
+                for t in self.tickers:
+                    store.add_statement(
+                        t, self.balance_sheets.get(t), "balance", annual_lag
+                    )
+                    store.add_statement(
+                        t, self.income_statements.get(t), "income", annual_lag
+                    )
+
+                    quarterly = self._quarterly_income.get(t)
+
+                    if quarterly is not None and not quarterly.empty:
+                        quarterly = quarterly.sort_index(axis=1)
+                        ttm = quarterly.T.rolling(4).sum().dropna(how="all").T
+                        store.add_statement(
+                            t, ttm, "income_ttm", quarterly_lag
+                        )
+
+                store.classifications = self.classifications
+                store.build_index()
+                self._fundamentals = store
+
+        return self._fundamentals
+
+    def as_of(self, date):
+        """Return a view of this data as it was known on ``date``."""
+        return PointInTimeCompanies(self, date)
+
     def _bs(self, ticker):
         """Return the latest balance sheet series for a ticker."""
 
@@ -163,24 +259,51 @@ class Companies:
         """Return total revenue (sales) for the given ticker."""
         return self._inc(ticker)["Total Revenue"]
 
+    def book_equity(self, ticker):
+        """Return book equity, falling back to assets minus liabilities."""
+
+        bs = self._bs(ticker)
+
+        if "Stockholders Equity" in bs.index:
+            return bs["Stockholders Equity"]
+
+        return self.total_assets(ticker) - self.total_liabilities(ticker)
+
     def market_equity(self, ticker):
         """Return market capitalization used as market equity."""
         return self.market_data[ticker]["market_cap"]
 
+    @property
+    def classifications(self):
+        """Return sector, industry and country by ticker."""
+
+        return pd.DataFrame(
+            [self.market_data.get(t) or {} for t in self.tickers],
+            index=pd.Index(self.tickers, name="Ticker")
+        ).reindex(columns=["sector", "industry", "country"])
+
     def equity_volatility(self, ticker):
         """Return annualized equity return volatility from price history."""
 
         if ticker not in self.prices:
             raise ValueError(f"{ticker}: No price data")
 
-        prices = self.prices[ticker]
-
-        returns = np.log(
-            prices / prices.shift(1)
-        ).dropna()
+        returns = self.log_returns[ticker].dropna()
 
         return returns.std() * np.sqrt(252)
 
+    @property
+    def log_returns(self):
+        """Return daily log-returns for all tickers (dates x tickers)."""
+
+        if self._log_returns is None:
+
+            prices = self.prices
+
+            self._log_returns = np.log(prices / prices.shift(1)).iloc[1:]
+
+        return self._log_returns
+
     def total_debt(self, ticker):
         """Return total debt, using fallback fields when needed."""
 
@@ -199,3 +322,163 @@ class Companies:
         return 0.5 * bs[
             "Total Liabilities Net Minority Interest"
         ]
+
+
+class PointInTimeCompanies(Companies):
+    """Read-only view of ``Companies`` evaluated as of a historical date.
+
+    Statements come from the point-in-time store, prices are truncated at
+    the as-of date, and market equity is rescaled from the current market
+    capitalization by the price ratio (constant share count assumption).
+    Every ``Companies`` accessor is served from the store or the parent;
+    the view never downloads anything and cannot be refreshed.
+    """
+
+    def __init__(self, companies, as_of, store=None):
+        """Initialize the view over a parent data container."""
+
+        self.companies = companies
+        self.as_of_date = pd.Timestamp(as_of)
+        self.store = store if store is not None else companies.fundamentals
+
+        self.tickers = companies.tickers
+        self.interval = companies.interval
+        self.provider = companies.provider
+
+        self._log_returns = None
+        self.model_cache = ModelCache(companies.model_cache.maxsize)
+
+    @property
+    def data_version(self):
+        """Return the parent data version tagged with the as-of date."""
+        return (self.companies.data_version, self.as_of_date)
+
+    @property
+    def prices(self):
+        """Return parent prices observed up to the as-of date."""
+
+        prices = self.companies.prices
+
+        if prices.empty:
+            return prices
+
+        index = prices.index
+
+        cutoff = self.as_of_date
+
+        if index.tz is not None and cutoff.tz is None:
+            cutoff = cutoff.tz_localize(index.tz)
+
+        return prices.loc[index <= cutoff]
+
+    @property
+    def market_data(self):
+        """Return the parent market metadata."""
+        return self.companies.market_data
+
+    @property
+    def fundamentals(self):
+        """Return the point-in-time store the view reads from."""
+        return self.store
+
+    @property
+    def balance_sheets(self):
+        """Return the balance sheet available at the as-of date by ticker.
+
+        Each statement has a single column named after its period end,
+        or is None when nothing was published yet.
+        """
+
+        sheets = {}
+
+        for t in self.tickers:
+            bs = self.store.snapshot(t, self.as_of_date, "balance")
+            sheets[t] = None if bs.empty else bs.to_frame()
+
+        return sheets
+
+    @property
+    def income_statements(self):
+        """Return the TTM and annual income statements available by ticker.
+
+        Mirrors ``Companies.income_statements``: a "TTM" column when
+        quarterly data was published, followed by the latest annual period.
+        """
+
+        statements = {}
+
+        for t in self.tickers:
+            ttm = self.store.snapshot(t, self.as_of_date, "income_ttm")
+            annual = self.store.snapshot(t, self.as_of_date, "income")
+
+            if annual.empty and ttm.empty:
+                statements[t] = None
+                continue
+
+            columns = []
+            if not ttm.empty:
+                columns.append(ttm.rename("TTM"))
+            if not annual.empty:
+                columns.append(annual)
+
+            statements[t] = pd.concat(columns, axis=1)
+
+        return statements
+
+    def refresh(self):
+        """Refuse to refresh; the view is read-only."""
+
+        raise NotImplementedError(
+            "Point-in-time views are read-only; refresh the parent "
+            "Companies and call as_of() again"
+        )
+
+    def as_of(self, date):
+        """Return a view of the parent data as known on ``date``."""
+        return PointInTimeCompanies(self.companies, date, self.store)
+
+    def _bs(self, ticker):
+        """Return the balance sheet available at the as-of date."""
+
+        bs = self.store.snapshot(ticker, self.as_of_date, "balance")
+
+        if bs.empty:
+            raise ValueError(
+                f"{ticker}: Balance sheet unavailable as of "
+                f"{self.as_of_date.date()}"
+            )
+
+        return bs
+
+    def _inc(self, ticker):
+        """Return the income statement available, preferring TTM."""
+
+        for statement in ("income_ttm", "income"):
+            inc = self.store.snapshot(ticker, self.as_of_date, statement)
+
+            if not inc.empty:
+                return inc
+
+        raise ValueError(
+            f"{ticker}: Income statement unavailable as of "
+            f"{self.as_of_date.date()}"
+        )
+
+    def market_equity(self, ticker):
+        """Return market capitalization rescaled to the as-of price."""
+
+        market_cap = self.companies.market_equity(ticker)
+        full = self.companies.prices
+
+        if market_cap is None or ticker not in full:
+            return market_cap
+
+        history = self.prices[ticker].dropna()
+        latest = full[ticker].dropna()
+
+        if history.empty or latest.empty:
+            raise ValueError(
+                f"{ticker}: No price data as of {self.as_of_date.date()}"
+            )
+
+        return market_cap * history.iloc[-1] / latest.iloc[-1]
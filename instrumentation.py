@@ -0,0 +1,304 @@
+import cProfile
+import functools
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import weakref
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger("risk_analysis.perf")
+
+
+class Instrumentation:
+    """Collects stage timings, remote call counters and cache statistics.
+
+    A single module-level instance, ``PERF``, is shared by the data layer,
+    the models and the visualization layer. When DEBUG logging is enabled,
+    every finished stage is also emitted as a JSON record on the
+    ``risk_analysis.perf`` logger. ``session()`` and ``collect()`` give one
+    caller (e.g. a dashboard session) its own timers and counters.
+    """
+
+    def __init__(self):
+        """Initialize empty timers, counters and cache registry."""
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._caches = weakref.WeakValueDictionary()
+        self._profiler = None
+        self._profile_text = None
+        self._samples = None
+
+        self.reset()
+
+    def reset(self):
+        """Clear timers and counters, keeping registered caches."""
+
+        with self._lock:
+            self._stages = defaultdict(
+                lambda: {"calls": 0, "total": 0.0, "max": 0.0}
+            )
+            self._tickers = defaultdict(lambda: defaultdict(float))
+            self._counters = Counter()
+            self._started = time.time()
+
+    @contextmanager
+    def stage(self, name, ticker=None):
+        """Time a block of code as ``name``, optionally for one ticker."""
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+
+            for target in self._targets():
+                with target._lock:
+                    stats = target._stages[name]
+                    stats["calls"] += 1
+                    stats["total"] += elapsed
+                    stats["max"] = max(stats["max"], elapsed)
+
+                    if ticker is not None:
+                        target._tickers[ticker][name] += elapsed
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json.dumps({
+                    "event": "stage",
+                    "stage": name,
+                    "ticker": ticker,
+                    "seconds": round(elapsed, 6),
+                }))
+
+    def timed(self, name, per_ticker=False):
+        """Decorator timing every call of a function as stage ``name``.
+
+        With ``per_ticker=True`` the first argument after ``self`` is
+        treated as the ticker the call belongs to.
+        """
+
+        def decorator(func):
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                ticker = None
+
+                if per_ticker and len(args) > 1:
+                    ticker = args[1]
+
+                with self.stage(name, ticker):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name, n=1):
+        """Increment a named counter."""
+
+        for target in self._targets():
+            with target._lock:
+                target._counters[name] += n
+
+    def remote_call(self, name, payload=None):
+        """Record one remote call and the approximate size of its payload."""
+
+        size = _payload_bytes(payload)
+
+        for target in self._targets():
+            with target._lock:
+                target._counters["remote_calls"] += 1
+                target._counters[f"remote_calls.{name}"] += 1
+                target._counters["remote_bytes"] += size
+                target._counters[f"remote_bytes.{name}"] += size
+
+    def _targets(self):
+        """Return this instance and the sessions collecting on this thread."""
+        return [self, *getattr(self._local, "sessions", ())]
+
+    def session(self):
+        """Return an empty instance sharing this one's cache registry.
+
+        Work is recorded into it only inside ``collect``; cache statistics
+        stay shared, since the caches themselves are.
+        """
+
+        session = Instrumentation()
+        session._caches = self._caches
+
+        return session
+
+    @contextmanager
+    def collect(self, session):
+        """Also record this thread's stages and counters into ``session``.
+
+        Nested blocks for the same session record each event once.
+        """
+
+        sessions = self._local.__dict__.setdefault("sessions", [])
+
+        if session in sessions:
+            yield session
+            return
+
+        sessions.append(session)
+
+        try:
+            yield session
+        finally:
+            sessions.remove(session)
+
+    def register_cache(self, name, cache):
+        """Register an object with a ``stats()`` method for reporting.
+
+        Caches are held weakly. A name already used by another live cache
+        gets a numeric suffix, so several instances are all reported.
+
+        Returns:
+            str: The name the cache is reported under.
+        """
+
+        with self._lock:
+            key, n = name, 1
+
+            while self._caches.get(key) not in (None, cache):
+                n += 1
+                key = f"{name}#{n}"
+
+            self._caches[key] = cache
+
+        return key
+
+    def start_profile(self):
+        """Start a cProfile session covering all subsequent work."""
+
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_profile(self, limit=25):
+        """Stop profiling and keep the top functions by cumulative time."""
+
+        if self._profiler is None:
+            return None
+
+        self._profiler.disable()
+
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out) \
+            .sort_stats("cumulative") \
+            .print_stats(limit)
+
+        self._profiler = None
+        self._profile_text = out.getvalue()
+
+        return self._profile_text
+
+    @contextmanager
+    def sample(self, interval=0.005, thread_id=None):
+        """Sample the stack of a thread and count hot functions.
+
+        A lightweight alternative to cProfile with negligible overhead on
+        the sampled code; results appear under "samples" in the report.
+        """
+
+        target = thread_id or threading.get_ident()
+        samples = Counter()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                frame = sys._current_frames().get(target)
+
+                if frame is not None:
+                    code = frame.f_code
+                    samples[
+                        f"{code.co_filename}:{code.co_name}:{frame.f_lineno}"
+                    ] += 1
+
+        sampler = threading.Thread(target=run, daemon=True)
+        sampler.start()
+
+        try:
+            yield samples
+        finally:
+            stop.set()
+            sampler.join()
+            self._samples = samples
+
+    def report(self):
+        """Return all collected measurements as a JSON-serializable dict."""
+
+        with self._lock:
+
+            stages = {
+                name: {
+                    "calls": s["calls"],
+                    "total_seconds": round(s["total"], 6),
+                    "mean_seconds": round(s["total"] / s["calls"], 6),
+                    "max_seconds": round(s["max"], 6),
+                }
+                for name, s in sorted(
+                    self._stages.items(),
+                    key=lambda item: -item[1]["total"]
+                )
+            }
+
+            tickers = {
+                ticker: {k: round(v, 6) for k, v in times.items()}
+                for ticker, times in self._tickers.items()
+            }
+
+            caches = {}
+            for name, cache in list(self._caches.items()):
+                try:
+                    caches[name] = cache.stats()
+                except Exception as e:
+                    caches[name] = {"error": str(e)}
+
+            report = {
+                "started": self._started,
+                "elapsed_seconds": round(time.time() - self._started, 6),
+                "stages": stages,
+                "tickers": tickers,
+                "counters": dict(self._counters),
+                "caches": caches,
+            }
+
+        if self._profile_text:
+            report["profile"] = self._profile_text
+
+        if self._samples:
+            report["samples"] = dict(self._samples.most_common(25))
+
+        return report
+
+    def write_report(self, path):
+        """Write the report to ``path`` as JSON."""
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, default=str)
+
+
+def _payload_bytes(payload):
+    """Approximate the in-memory size of a remote call result."""
+
+    if payload is None:
+        return 0
+
+    if hasattr(payload, "memory_usage"):
+        usage = payload.memory_usage(deep=True)
+        return int(getattr(usage, "sum", lambda: usage)())
+
+    try:
+        return len(json.dumps(payload, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(payload)
+
+
+PERF = Instrumentation()
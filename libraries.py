@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 from scipy.stats import norm
+from scipy.cluster.hierarchy import fcluster, linkage
 
 # ===============================
 # VISUALIZATION
@@ -0,0 +1,211 @@
+import argparse
+import json
+import math
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from libraries import np
+from financial_statements import Companies
+from data_processing import LocalProvider
+from scoring_service import create_server
+
+
+def run_load_test(url, tickers, n_requests=1000, concurrency=32,
+                  timeout=30, expected=None):
+    """Fire concurrent single-ticker requests at a scoring service.
+
+    Args:
+        url: Base URL of the service, e.g. "http://127.0.0.1:8000".
+        tickers: Tickers to request, cycled over ``n_requests``.
+        n_requests: Total number of requests.
+        concurrency: Number of client threads.
+        timeout: Per-request timeout in seconds.
+        expected: Optional mapping of ticker to the result the service
+            should return; differing responses count as mismatches.
+
+    Returns:
+        dict: Request, error and mismatch counts, throughput, client-side
+        latency percentiles and the service's own ``/stats``.
+    """
+
+    url = url.rstrip("/")
+    latencies = np.full(n_requests, np.nan)
+    errors = []
+    mismatches = []
+
+    def request(i):
+        ticker = tickers[i % len(tickers)]
+        start = time.perf_counter()
+
+        try:
+            with urllib.request.urlopen(
+                f"{url}/score?ticker={ticker}", timeout=timeout
+            ) as response:
+                result = json.loads(response.read())
+
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            errors.append(f"{ticker}: {e}")
+            return
+
+        latencies[i] = time.perf_counter() - start
+
+        if expected is not None and not _same(result, expected.get(ticker)):
+            mismatches.append(ticker)
+
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(request, range(n_requests)))
+
+    elapsed = time.perf_counter() - start
+
+    done = latencies[~np.isnan(latencies)] * 1000
+
+    report = {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "mismatches": len(mismatches),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(n_requests / elapsed, 1),
+    }
+
+    for q in (50, 90, 99):
+        report[f"latency_p{q}_ms"] = (
+            round(float(np.percentile(done, q)), 3) if len(done) else None
+        )
+
+    with urllib.request.urlopen(f"{url}/stats", timeout=timeout) as r:
+        report["service"] = json.loads(r.read())
+
+    report["error_samples"] = errors[:5]
+
+    return report
+
+
+def _same(result, expected, rel_tol=1e-9):
+    """Compare two results, allowing rounding noise in float fields.
+
+    Batches of different sizes can differ in the last bits of a
+    vectorized sum, so floats are compared with a relative tolerance.
+    """
+
+    if not isinstance(result, dict) or not isinstance(expected, dict):
+        return result == expected
+
+    if result.keys() != expected.keys():
+        return False
+
+    for key, value in result.items():
+        other = expected[key]
+
+        if isinstance(value, float) and isinstance(other, float):
+            if not math.isclose(value, other, rel_tol=rel_tol):
+                return False
+
+        elif value != other:
+            return False
+
+    return True
+
+
+def main():
+    """Command line entry point; exits non-zero when a budget is missed.
+
+    Without ``--url`` a server is started in-process on a free port over
+    ``--data-dir`` (or a temporary synthetic universe), and responses are
+    checked against the engine scoring the same tickers directly.
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Load test for the local scoring service"
+    )
+    parser.add_argument("--url", help="Running service to target")
+    parser.add_argument(
+        "--tickers",
+        help="Comma-separated tickers to request with --url"
+    )
+    parser.add_argument("--data-dir")
+    parser.add_argument("--synthetic", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="risk_load_test_") as tmp:
+        report = _run(args, parser, tmp)
+
+    print(json.dumps(report, indent=2))
+
+    failed = (
+        report["errors"] > args.max_error_rate * args.requests
+        or report["mismatches"] > 0
+        or (
+            args.max_p99_ms is not None
+            and (report["latency_p99_ms"] or np.inf) > args.max_p99_ms
+        )
+    )
+
+    sys.exit(1 if failed else 0)
+
+
+def _run(args, parser, tmp):
+    """Start the target service if needed and return the load report.
+
+    A synthetic universe is written to ``tmp`` when neither ``--url`` nor
+    ``--data-dir`` is given.
+    """
+
+    server = None
+    expected = None
+
+    if args.url:
+        url = args.url
+
+        if not args.tickers:
+            parser.error("--tickers is required with --url")
+
+        tickers = [t.strip().upper() for t in args.tickers.split(",")]
+
+    else:
+        data_dir = args.data_dir
+
+        if data_dir is None:
+            data_dir = tmp
+            LocalProvider.generate_synthetic(data_dir, args.synthetic)
+
+        provider = LocalProvider(data_dir)
+        companies = Companies(provider.tickers(), "1y", provider)
+
+        server, batcher = create_server(companies, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        host, port = server.server_address[:2]
+        url = f"http://{host}:{port}"
+
+        tickers = companies.tickers
+        expected = batcher.engine.score(tickers)
+
+    try:
+        return run_load_test(
+            url,
+            tickers,
+            args.requests,
+            args.concurrency,
+            expected=expected
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
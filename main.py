@@ -1,10 +1,32 @@
+import functools
+
 import streamlit as st
 from altman import Altman
 from merton import Merton
 from financial_statements import Companies
 from visualization import Visualization
+from instrumentation import PERF
+
+
+def tracked(func):
+    """
+    Records the stages and counters of ``func`` into this
+    session's own performance counters, so the panel does
+    not show the work of other sessions.
+    """
 
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if "perf" not in st.session_state:
+            st.session_state.perf = PERF.session()
 
+        with PERF.collect(st.session_state.perf):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@tracked
 def main():
     """
     Main entry point of the Stock Market Risk Dashboard.
@@ -19,6 +41,11 @@ def main():
         2. Risk model computation.
         3. Interactive visualization.
         4. Credit approval decision.
+
+    Inputs are submitted as a form so editing the ticker box
+    does not rerun the page until Run is pressed. Each section
+    is a fragment that reruns on its own, and model outputs and
+    figures are cached per data version.
     """
 
     st.set_page_config(
@@ -46,6 +73,47 @@ def main():
         """
         return Companies(tickers, interval)
 
+    @st.cache_data(show_spinner=False, max_entries=32)
+    def altman_results(_companies, data_key):
+        """
+        Computes Altman Z-Scores once per data version.
+
+        Parameters
+        ----------
+        _companies : Companies
+            Financial data container (excluded from hashing).
+        data_key : tuple
+            Tickers, interval and data version identifying the data.
+        """
+        return Altman(_companies).z_scores_df().dropna()
+
+    @st.cache_data(show_spinner=False, max_entries=32)
+    def merton_results(_companies, data_key):
+        """
+        Computes Merton distance to default and PD once
+        per data version.
+        """
+        return Merton(_companies).merton_df().dropna()
+
+    @st.cache_resource(max_entries=128)
+    def render_artifact(name, data_key, _build, _df):
+        """
+        Builds a figure once per data version and reuses the
+        same object on later reruns.
+
+        Parameters
+        ----------
+        name : str
+            Artifact name, part of the cache key.
+        data_key : tuple
+            Data version key, part of the cache key.
+        _build : callable
+            Figure builder (excluded from hashing).
+        _df : pandas.DataFrame
+            Input passed to the builder (excluded from hashing).
+        """
+        return _build(_df)
+
     if "companies" not in st.session_state:
         """
         Initializes session storage used to persist
@@ -60,29 +128,33 @@ def main():
 
     viz = Visualization()
 
-    col1, col2, col3 = st.columns([4, 2, 1])
+    with st.form("inputs", border=False):
 
-    with col1:
-        raw_tickers = st.text_input(
-            "Tickers",
-            value="AZO, MA, BA, F"
-        )
+        col1, col2, col3 = st.columns([4, 2, 1])
 
-    with col2:
-        interval = st.selectbox(
-            "Interval",
-            ["6mo", "1y", "2y", "5y", "10y"]
-        )
+        with col1:
+            raw_tickers = st.text_input(
+                "Tickers",
+                value="AZO, MA, BA, F"
+            )
 
-    with col3:
-        st.write("")
-        st.write("")
-        run_analysis = st.button(
-            "Run",
-            type="primary"
-        )
+        with col2:
+            interval = st.selectbox(
+                "Interval",
+                ["6mo", "1y", "2y", "5y", "10y"]
+            )
+
+        with col3:
+            st.write("")
+            st.write("")
+            run_analysis = st.form_submit_button(
+                "Run",
+                type="primary"
+            )
 
     if run_analysis:
+        st.session_state.perf.reset()
+
         tickers = [
             t.strip().upper()
             for t in raw_tickers.split(",")
@@ -107,13 +179,32 @@ def main():
 
     companies = st.session_state.companies
 
-    st.markdown("---")
-    st.header("Altman Z-Score")
+    data_key = (
+        tuple(companies.tickers),
+        companies.interval,
+        companies.data_version
+    )
+
+    z_df = altman_results(companies, data_key)
+    merton_df = merton_results(companies, data_key)
 
-    altman = Altman(companies)
-    z_df = altman.z_scores_df().dropna()
+    large = (
+        max(len(z_df), len(merton_df)) > viz.LARGE_UNIVERSE_ROWS
+    )
 
-    if not z_df.empty:
+    @st.fragment
+    @tracked
+    def altman_section():
+        """
+        Altman Z-Score table and chart, rerun independently
+        of the rest of the page.
+        """
+
+        st.markdown("---")
+        st.header("Altman Z-Score")
+
+        if z_df.empty:
+            return
 
         colA, colB = st.columns([1, 2])
 
@@ -121,49 +212,102 @@ def main():
             st.markdown("<br><br><br>",
                         unsafe_allow_html=True)
             st.dataframe(
-                z_df,
+                viz.summary_table(z_df) if large else z_df,
                 use_container_width=True
             )
 
         with colB:
-            viz.plot_altman(z_df)
+            viz.show(render_artifact(
+                "altman", data_key, viz.altman_figure, z_df
+            ))
 
-    st.markdown("---")
-    st.header("Merton Model")
+    @st.fragment
+    @tracked
+    def merton_section():
+        """
+        Merton table with Distance to Default and PD charts.
+        """
 
-    merton = Merton(companies)
-    merton_df = merton.merton_df().dropna()
+        st.markdown("---")
+        st.header("Merton Model")
 
-    if merton_df.empty:
-        st.warning("No valid Merton results.")
-        return
+        if merton_df.empty:
+            st.warning("No valid Merton results.")
+            return
 
-    formatted_merton = viz.format_merton_table(
-        merton_df
-    )
+        if large:
+            formatted_merton = viz.summary_table(merton_df)
+        else:
+            formatted_merton = viz.format_merton_table(
+                merton_df
+            )
 
-    st.dataframe(
-        formatted_merton,
-        use_container_width=True
-    )
+        st.dataframe(
+            formatted_merton,
+            use_container_width=True
+        )
 
-    col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
 
-    with col1:
-        viz.plot_merton_dd(merton_df)
+        with col1:
+            viz.show(render_artifact(
+                "merton_dd", data_key, viz.merton_dd_figure, merton_df
+            ))
 
-    with col2:
-        viz.plot_pd(merton_df)
+        with col2:
+            viz.show(render_artifact(
+                "pd", data_key, viz.pd_figure, merton_df
+            ))
 
-    st.markdown("---")
-    st.header("Credit Decision")
+    @st.fragment
+    @tracked
+    def credit_section():
+        """
+        Unified credit decision table.
+        """
 
-    credit_df = viz.build_credit_table(
-        z_df,
-        merton_df
-    )
+        st.markdown("---")
+        st.header("Credit Decision")
+
+        credit_df = viz.build_credit_table(
+            z_df,
+            merton_df,
+            formatted=False
+        )
+
+        if len(credit_df) > viz.LARGE_UNIVERSE_ROWS:
+            viz.plot_credit_table_paged(credit_df)
+            return
+
+        viz.show(render_artifact(
+            "credit_table",
+            data_key,
+            viz.credit_table_figure,
+            viz.format_credit_table(credit_df)
+        ))
+
+    @st.fragment
+    @tracked
+    def performance_section():
+        """
+        Optional performance panel with its own toggle so
+        switching it does not rerun the models or charts.
+        """
+
+        if st.toggle("Show performance panel", value=False):
+            st.markdown("---")
+            viz.plot_performance(
+                st.session_state.perf.report()
+            )
+
+    altman_section()
+    merton_section()
+
+    if merton_df.empty:
+        return
 
-    viz.plot_credit_table(credit_df)
+    credit_section()
+    performance_section()
 
     st.markdown("---")
     st.header("Bibliography")
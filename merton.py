@@ -1,12 +1,13 @@
 from libraries import norm, np , pd
 from risk_models import RiskModel
+from instrumentation import PERF
 
 class Merton(RiskModel):
     """Merton structural model for default risk estimation."""
 
-    def __init__(self, companies, rf=0.03):
+    def __init__(self, companies, rf=0.03, cache=None):
         """Initialize the model with company data and risk-free rate."""
-        super().__init__(companies)
+        super().__init__(companies, cache)
         self.rf = rf
 
     def V(self, ticker):
@@ -22,11 +23,23 @@ class Merton(RiskModel):
 
     def vol(self, ticker):
         """Return annualized equity volatility for a ticker."""
-        return self.companies.equity_volatility(ticker)
+        return self._cached(
+            "vol", ticker, (),
+            lambda: self.companies.equity_volatility(ticker)
+        )
 
     def distance_to_default(self, ticker, T=1):
         """Compute distance to default over horizon T in years."""
 
+        return self._cached(
+            "dd", ticker, (self.rf, T),
+            lambda: self._distance_to_default(ticker, T)
+        )
+
+    @PERF.timed("merton.distance_to_default", per_ticker=True)
+    def _distance_to_default(self, ticker, T):
+        """Compute distance to default without memoization."""
+
         V = self.V(ticker)
         D = self.D(ticker)
         sigma = self.vol(ticker)
@@ -34,19 +47,174 @@ class Merton(RiskModel):
         if D <= 0 or sigma <= 0:
             raise ValueError(f"{ticker}: invalid inputs")
 
-        DD = (
-            np.log(V / D)
-            + (self.rf + sigma**2 / 2) * T
-        ) / (sigma * np.sqrt(T))
-
-        return DD
+        return self.dd_from_inputs(V, D, sigma, self.rf, T)
 
     def probability_of_default(self, ticker, T=1):
         """Compute default probability in percentage terms."""
 
-        DD = self.distance_to_default(ticker, T)
+        return self._cached(
+            "pd", ticker, (self.rf, T),
+            lambda: self.pd_from_dd(self.distance_to_default(ticker, T))
+        )
+
+    @staticmethod
+    def dd_from_inputs(V, D, sigma, rf, T=1):
+        """Vectorized distance to default from firm value, debt and vol."""
+
+        return (
+            np.log(V / D)
+            + (rf + sigma**2 / 2) * T
+        ) / (sigma * np.sqrt(T))
+
+    @staticmethod
+    def pd_from_dd(DD):
+        """Vectorized probability of default in percent from DD."""
         return (1 - norm.cdf(DD)) * 100
 
+    def inputs_df(self, tickers=None):
+        """Return firm value, default point and volatility by ticker.
+
+        Tickers with missing or invalid inputs are skipped.
+        """
+
+        data = []
+
+        if tickers is None:
+            tickers = self.companies.tickers
+
+        for ticker in tickers:
+
+            try:
+                data.append({
+                    "Ticker": ticker,
+                    "V": self.V(ticker),
+                    "D": self.D(ticker),
+                    "sigma": self.vol(ticker),
+                })
+
+            except Exception as e:
+                print(f"⚠️ {ticker} skipped → {e}")
+
+        if not data:
+            return pd.DataFrame(
+                columns=["V", "D", "sigma"]
+            ).rename_axis("Ticker")
+
+        return pd.DataFrame(data).set_index("Ticker")
+
+    @PERF.timed("merton.bootstrap_df")
+    def bootstrap_df(self, T=1, n_boot=1000, block_size=21, confidence=0.95,
+                     chunk_bytes=256 * 2**20, seed=None):
+        """Block-bootstrap volatility into DD and PD confidence intervals.
+
+        Resamples overlapping blocks of daily log-returns for all tickers at
+        once, so each bootstrap replicate keeps the cross-section aligned.
+        Replicates are processed in chunks whose gathered block moments
+        stay below ``chunk_bytes``.
+
+        Args:
+            T: Horizon in years.
+            n_boot: Number of bootstrap replicates.
+            block_size: Length of each resampled block in trading days.
+            confidence: Two-sided confidence level of the intervals.
+            chunk_bytes: Memory budget for one chunk of replicates.
+            seed: Optional random seed.
+
+        Returns:
+            pandas.DataFrame: Point estimates with lower/upper bounds for
+            volatility, Distance to Default and Probability of Default.
+        """
+
+        tickers, V, D = [], [], []
+
+        for ticker in self.companies.tickers:
+
+            try:
+                v, d = self.V(ticker), self.D(ticker)
+
+                if d <= 0:
+                    raise ValueError(f"{ticker}: invalid inputs")
+
+                tickers.append(ticker)
+                V.append(v)
+                D.append(d)
+
+            except Exception as e:
+                print(f"⚠️ {ticker} skipped → {e}")
+
+        returns = self.companies.log_returns.reindex(columns=tickers)
+        R = returns.to_numpy(dtype=float)
+        n_obs = len(R)
+
+        if not tickers or n_obs < 2:
+            return pd.DataFrame()
+
+        block_size = min(block_size, n_obs)
+        n_blocks = -(-n_obs // block_size)
+        last = n_obs - (n_blocks - 1) * block_size
+
+        # Cumulative sums turn every block's count, sum and sum of squares
+        # into two lookups, so replicates gather blocks instead of days.
+        observed = ~np.isnan(R)
+        X = np.where(observed, R, 0.0)
+
+        cums = [
+            np.vstack([np.zeros((1, len(tickers))), np.cumsum(a, axis=0)])
+            for a in (observed.astype(float), X, X**2)
+        ]
+
+        rng = np.random.default_rng(seed)
+
+        chunk = max(1, int(chunk_bytes // (3 * n_blocks * X[0].nbytes)))
+        sigma = np.empty((n_boot, len(tickers)))
+
+        for start in range(0, n_boot, chunk):
+
+            n = min(chunk, n_boot - start)
+
+            starts = rng.integers(0, n_obs - block_size + 1, (n, n_blocks))
+            ends = starts + block_size
+            ends[:, -1] = starts[:, -1] + last
+
+            count, total, squares = (
+                (c[ends] - c[starts]).sum(axis=1) for c in cums
+            )
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                var = (squares - total**2 / count) / (count - 1)
+
+            sigma[start:start + n] = np.sqrt(np.clip(var, 0, None) * 252)
+
+        V, D = np.asarray(V, dtype=float), np.asarray(D, dtype=float)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sigma = np.where(sigma > 0, sigma, np.nan)
+            dd = self.dd_from_inputs(V, D, sigma, self.rf, T)
+            point_sigma = returns.std().to_numpy() * np.sqrt(252)
+            point_dd = self.dd_from_inputs(V, D, point_sigma, self.rf, T)
+
+        tail = (1 - confidence) / 2 * 100
+        q = [tail, 100 - tail]
+
+        vol_lo, vol_hi = np.nanpercentile(sigma, q, axis=0)
+        dd_lo, dd_hi = np.nanpercentile(dd, q, axis=0)
+
+        return pd.DataFrame(
+            {
+                "Volatility": point_sigma,
+                "Volatility Lower": vol_lo,
+                "Volatility Upper": vol_hi,
+                "Distance to Default": point_dd,
+                "DD Lower": dd_lo,
+                "DD Upper": dd_hi,
+                "Probability of Default": self.pd_from_dd(point_dd),
+                "PD Lower": self.pd_from_dd(dd_hi),
+                "PD Upper": self.pd_from_dd(dd_lo),
+            },
+            index=pd.Index(tickers, name="Ticker")
+        )
+
+    @PERF.timed("merton.merton_df")
     def merton_df(self):
         """Return a dataframe with distance to default and PD by ticker."""
 
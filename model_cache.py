@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+
+class ModelCache:
+    """Bounded LRU cache for risk model outputs with hit/miss counters.
+
+    Entries are tagged with the data version of the ``Companies`` object
+    they were computed from; a lookup with a newer version drops every
+    stale entry before computing.
+    """
+
+    # Outputs memoized per ticker: Altman ratios and Z (a few variants),
+    # Merton volatility, DD and PD.
+    ENTRIES_PER_TICKER = 8
+
+    def __init__(self, maxsize=4096):
+        """Initialize an empty cache holding at most ``maxsize`` entries."""
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._data = OrderedDict()
+        self._version = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self._data)
+
+    def get_or_compute(self, key, compute, version=None):
+        """Return the cached value for ``key``, computing it on a miss.
+
+        Args:
+            key: Hashable cache key.
+            compute: Zero-argument callable producing the value.
+            version: Data version the value depends on.
+
+        Returns:
+            The cached or freshly computed value. Exceptions raised by
+            ``compute`` propagate and nothing is stored.
+        """
+
+        with self._lock:
+
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+
+            if version == self._version:
+                self._data[key] = value
+                self._data.move_to_end(key)
+
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+        return value
+
+    def invalidate(self):
+        """Drop every cached entry."""
+
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Return hit/miss counters, size and hit rate."""
+
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    @classmethod
+    def for_tickers(cls, n_tickers, minsize=4096):
+        """Return a cache large enough to hold every output of a universe.
+
+        Args:
+            n_tickers: Number of tickers whose outputs are memoized.
+            minsize: Lower bound on the capacity.
+        """
+
+        return cls(max(minsize, n_tickers * cls.ENTRIES_PER_TICKER))
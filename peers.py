@@ -0,0 +1,288 @@
+from libraries import np, pd
+from scipy.stats import rankdata
+from altman import Altman
+from merton import Merton
+from instrumentation import PERF
+
+
+class PeerAnalytics:
+    """Peer-relative ranking of risk metrics within sector or industry.
+
+    For every metric it reports the percentile rank within the peer group,
+    the z-score against the group mean and standard deviation, and the
+    group median. All groups are ranked together with grouped vectorized
+    operations; ``update`` and ``add`` recompute only the groups a change
+    touches.
+    """
+
+    METRICS = [
+        "Z-Score",
+        "Distance to Default",
+        "Probability of Default",
+    ]
+
+    UNCLASSIFIED = "Unclassified"
+
+    # Above this many touched groups one grouped pass is cheaper.
+    NUMPY_GROUPS = 8
+
+    def __init__(self, metrics, groups):
+        """Initialize the analytics.
+
+        Args:
+            metrics: Ticker-indexed dataframe with one column per metric.
+            groups: Ticker-indexed series of peer group labels.
+        """
+
+        self.metrics = metrics.copy()
+        self.groups = (
+            groups.reindex(metrics.index)
+            .fillna(self.UNCLASSIFIED)
+            .astype(str)
+        )
+
+        self._result = None
+        self._members = None
+
+    @classmethod
+    def from_companies(cls, companies, level="industry", rf=0.03):
+        """Build peer analytics from Altman and Merton outputs.
+
+        Args:
+            companies: ``Companies`` data container.
+            level: Classification used as peer group, "sector" or
+                "industry".
+            rf: Risk-free rate used by the Merton model.
+        """
+
+        metrics = Altman(companies).z_scores_df()[["Z-Score"]].join(
+            Merton(companies, rf=rf).merton_df(),
+            how="outer"
+        )
+
+        groups = companies.fundamentals.classification(metrics.index, level)
+
+        return cls(metrics, groups)
+
+    @staticmethod
+    def _rank(metrics, groups):
+        """Compute peer statistics for the given rows in one pass."""
+
+        grouped = metrics.groupby(groups, sort=False)
+
+        mean = grouped.transform("mean")
+        std = grouped.transform("std")
+        median = grouped.transform("median")
+        pct = grouped.rank(pct=True, method="average")
+
+        out = {"Peer Group": groups}
+
+        for column in metrics.columns:
+            out[column] = metrics[column]
+            out[f"{column} Peer Pct"] = pct[column] * 100
+            out[f"{column} Peer Z"] = (
+                (metrics[column] - mean[column])
+                / std[column].replace(0, np.nan)
+            )
+            out[f"{column} Peer Median"] = median[column]
+
+        out["Peer Count"] = groups.map(groups.value_counts())
+
+        return pd.DataFrame(out, index=metrics.index)
+
+    @staticmethod
+    def _group_stats(values):
+        """Peer statistics of one group with plain numpy.
+
+        Args:
+            values: Array of shape (members, metrics).
+
+        Returns:
+            numpy.ndarray: For every metric the value, percentile rank,
+            peer z-score and peer median, in ``_rank`` column order.
+        """
+
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0, ddof=1)
+        median = np.nanmedian(values, axis=0)
+
+        valid = (~np.isnan(values)).sum(axis=0)
+        pct = rankdata(values, axis=0, nan_policy="omit") / valid * 100
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = (values - mean) / np.where(std == 0, np.nan, std)
+
+        out = np.stack(
+            [values, pct, z, np.broadcast_to(median, values.shape)],
+            axis=2
+        )
+
+        return out.reshape(len(values), -1)
+
+    @PERF.timed("peers.rank")
+    def rank(self):
+        """Return peer statistics for the whole universe.
+
+        Returns:
+            pandas.DataFrame: Per ticker, the peer group, each metric, its
+            percentile rank (0-100, higher means a larger value), peer
+            z-score and peer median, plus the group size.
+        """
+
+        if self._result is None:
+            self._result = self._rank(self.metrics, self.groups)
+
+        return self._result
+
+    def _group_members(self):
+        """Return the set of tickers in each peer group."""
+
+        if self._members is None:
+            self._members = {
+                group: set(index)
+                for group, index in self.groups.groupby(
+                    self.groups, sort=False
+                ).groups.items()
+            }
+
+        return self._members
+
+    def _refresh(self, groups):
+        """Re-rank the given peer groups and write them into the result.
+
+        A few groups are ranked with plain numpy and written back by
+        position, since the grouped pandas path of ``_rank`` costs more
+        than the work for one or two groups; many groups go through one
+        ``_rank`` pass over their rows.
+        """
+
+        result = self.rank()
+        members = self._group_members()
+
+        if len(groups) > self.NUMPY_GROUPS:
+            rows = [t for g in groups for t in members.get(g, ())]
+            ranked = self._rank(self.metrics.loc[rows], self.groups.loc[rows])
+
+            pos = result.index.get_indexer(rows)
+            for j, column in enumerate(result.columns):
+                result.iloc[pos, j] = ranked[column].to_numpy()
+
+            return result
+
+        columns = result.columns.get_indexer([
+            name
+            for column in self.metrics.columns
+            for name in (
+                column,
+                f"{column} Peer Pct",
+                f"{column} Peer Z",
+                f"{column} Peer Median",
+            )
+        ])
+        label = result.columns.get_loc("Peer Group")
+        count = result.columns.get_loc("Peer Count")
+
+        for g in groups:
+            rows = list(members.get(g, ()))
+
+            if not rows:
+                continue
+
+            pos = result.index.get_indexer(rows)
+            values = self.metrics.loc[rows].to_numpy(dtype=float)
+
+            result.iloc[pos, columns] = self._group_stats(values)
+            result.iloc[pos, label] = g
+            result.iloc[pos, count] = len(rows)
+
+        return result
+
+    def add(self, metrics, groups=None):
+        """Add new tickers and refresh only the peer groups they join.
+
+        Growing the universe copies the metric, group and result frames
+        once per call, so many new tickers should be added together here
+        rather than one by one through ``update``.
+
+        Args:
+            metrics: Ticker-indexed dataframe of new tickers' metrics.
+            groups: Ticker-indexed series of their peer group labels.
+
+        Returns:
+            pandas.DataFrame: The updated peer statistics.
+        """
+
+        if metrics.index.isin(self.metrics.index).any():
+            raise ValueError("Tickers already present; use update()")
+
+        result = self.rank()
+        members = self._group_members()
+
+        groups = (
+            pd.Series(groups, dtype=object)
+            .reindex(metrics.index)
+            .fillna(self.UNCLASSIFIED)
+            .astype(str)
+        )
+
+        self.metrics = pd.concat([
+            self.metrics,
+            metrics.reindex(columns=self.metrics.columns).astype(float)
+        ])
+        self.groups = pd.concat([self.groups, groups])
+        self._result = result.reindex(result.index.append(metrics.index))
+
+        for ticker, g in groups.items():
+            members.setdefault(g, set()).add(ticker)
+
+        return self._refresh(groups.unique())
+
+    def update(self, ticker, values=None, group=None):
+        """Change one ticker's metrics or group and refresh its peers.
+
+        Only the rows of the ticker's old and new peer groups are ranked
+        again and written into the cached result in place, so for a known
+        ticker the cost depends on the group sizes, not on the universe.
+        A new ticker goes through ``add``, which copies the universe
+        frames once.
+
+        Args:
+            ticker: Stock symbol to update (added if new).
+            values: Mapping of metric name to new value.
+            group: New peer group label.
+
+        Returns:
+            pandas.DataFrame: The updated peer statistics.
+        """
+
+        self.rank()
+        members = self._group_members()
+
+        if ticker not in self.metrics.index:
+            self.add(
+                pd.DataFrame(index=[ticker], columns=self.metrics.columns)
+            )
+
+        old_group = self.groups.at[ticker]
+
+        for column, value in (values or {}).items():
+            self.metrics.at[ticker, column] = value
+
+        if group is not None and str(group) != old_group:
+            group = str(group)
+
+            members[old_group].discard(ticker)
+            if not members[old_group]:
+                del members[old_group]
+
+            members.setdefault(group, set()).add(ticker)
+            self.groups.at[ticker] = group
+
+        return self._refresh({old_group, self.groups.at[ticker]})
+
+    def peer_summary(self):
+        """Return peer medians and group sizes by peer group."""
+
+        return self.metrics.groupby(self.groups).agg(
+            ["median", "count"]
+        )
@@ -0,0 +1,394 @@
+from libraries import np, pd
+
+
+class FundamentalsStore:
+    """Point-in-time store of financial statement snapshots.
+
+    Every statement value is kept together with its period end and the
+    date it became publicly available, so queries can be answered
+    "as of" any historical date without look-ahead bias.
+    """
+
+    # Typical filing delays: annual reports (10-K) are due 60-90 days after
+    # the fiscal year end, quarterly reports (10-Q) 40-45 days.
+    ANNUAL_LAG_DAYS = 90
+    QUARTERLY_LAG_DAYS = 45
+
+    COLUMNS = [
+        "Ticker",
+        "Statement",
+        "Field",
+        "Period End",
+        "Available",
+        "Value",
+    ]
+
+    def __init__(self, lag_days=45):
+        """Initialize an empty store.
+
+        Args:
+            lag_days: Default number of days between a period end and the
+                date its statement is assumed to be available.
+        """
+        self.lag_days = lag_days
+        self.classifications = pd.DataFrame(
+            columns=["sector", "industry", "country"]
+        )
+
+        self._frames = []
+        self._records = None
+        self._index = None
+
+    def classification(self, tickers, level="industry"):
+        """Return the peer group label of each ticker at ``level``."""
+
+        return self.classifications.reindex(tickers)[level]
+
+    def __len__(self):
+        """Return the number of stored snapshot values."""
+        return len(self.records)
+
+    def add_statement(self, ticker, statement, kind, lag_days=None):
+        """Add a yfinance-style statement (fields x period ends).
+
+        Columns that are not period-end dates (such as "TTM") are ignored.
+
+        Args:
+            ticker: Stock symbol the statement belongs to.
+            statement: DataFrame indexed by field with one column per period.
+            kind: Statement name, e.g. "balance", "income" or "income_ttm".
+            lag_days: Reporting lag override for this statement.
+        """
+
+        if statement is None or statement.empty:
+            return
+
+        lag = self.lag_days if lag_days is None else lag_days
+
+        period_end = pd.to_datetime(
+            pd.Series(statement.columns),
+            errors="coerce"
+        )
+        keep = period_end.notna().to_numpy()
+
+        if not keep.any():
+            return
+
+        values = statement.loc[:, keep]
+        period_end = pd.DatetimeIndex(period_end[keep])
+
+        n_fields, n_periods = values.shape
+
+        records = pd.DataFrame({
+            "Ticker": ticker.upper(),
+            "Statement": kind,
+            "Field": np.repeat(values.index.astype(str), n_periods),
+            "Period End": np.tile(period_end, n_fields),
+            "Value": pd.to_numeric(
+                pd.Series(values.to_numpy().ravel()),
+                errors="coerce"
+            ).to_numpy(),
+        })
+        records["Available"] = (
+            records["Period End"] + pd.Timedelta(days=lag)
+        )
+
+        self.add_records(records.dropna(subset=["Value"]))
+
+    def add_records(self, records):
+        """Add snapshot records with explicit availability dates.
+
+        Args:
+            records: DataFrame with the columns listed in ``COLUMNS``.
+                Use this to load real filing dates instead of the lag
+                approximation used by ``add_statement``.
+        """
+
+        missing = set(self.COLUMNS) - set(records.columns)
+
+        if missing:
+            raise ValueError(f"Missing snapshot columns: {sorted(missing)}")
+
+        self._frames.append(records[self.COLUMNS])
+        self._records = None
+        self._index = None
+
+    @property
+    def records(self):
+        """Return all snapshot records as a single dataframe."""
+
+        if self._records is None:
+
+            if not self._frames:
+                self._records = pd.DataFrame(columns=self.COLUMNS)
+            else:
+                records = pd.concat(self._frames, ignore_index=True)
+                records["Period End"] = pd.to_datetime(records["Period End"])
+                records["Available"] = pd.to_datetime(records["Available"])
+                records["Value"] = records["Value"].astype(float)
+
+                self._frames = [records]
+                self._records = records
+
+        return self._records
+
+    def build_index(self):
+        """Build the sorted composite indexes used by as-of lookups.
+
+        Two indexes are kept. The statement index is keyed by an integer
+        code for (ticker, statement) in the high 32 bits and the
+        availability day in the low 32 bits, and gives the latest period
+        end published by any date. The field index is keyed by a code for
+        (ticker, statement, field) and the period end, so every field is
+        read from that same period. A single ``searchsorted`` per index
+        answers any number of queries.
+        """
+
+        records = self.records
+
+        tickers = pd.Index(records["Ticker"].unique())
+        fields = pd.MultiIndex.from_frame(
+            records[["Statement", "Field"]].drop_duplicates()
+        )
+        statements = pd.Index(fields.get_level_values("Statement").unique())
+
+        t_codes = tickers.get_indexer(records["Ticker"])
+        f_codes = fields.get_indexer(
+            pd.MultiIndex.from_frame(records[["Statement", "Field"]])
+        )
+        s_codes = statements.get_indexer(records["Statement"])
+
+        keys = t_codes.astype(np.int64) * len(fields) + f_codes
+        s_keys = t_codes.astype(np.int64) * len(statements) + s_codes
+        days = _to_days(records["Available"])
+        periods = _to_days(records["Period End"])
+
+        order = np.lexsort((days, periods, keys))
+        s_order = np.lexsort((days, s_keys))
+
+        # Latest period end published so far within each statement key.
+        s_periods = (
+            pd.Series(periods[s_order])
+            .groupby(s_keys[s_order])
+            .cummax()
+            .to_numpy()
+        )
+
+        self._index = {
+            "tickers": tickers,
+            "fields": fields,
+            "statements": statements,
+            "field_statements": statements.get_indexer(
+                fields.get_level_values("Statement")
+            ),
+            "statement_keys": s_keys[s_order],
+            "statement_composite": _composite(s_keys[s_order], days[s_order]),
+            "statement_periods": s_periods,
+            "keys": keys[order],
+            "periods": periods[order],
+            "available": days[order],
+            "composite": _composite(keys[order], periods[order]),
+            "values": records["Value"].to_numpy()[order],
+            "period_end": records["Period End"].to_numpy()[order],
+        }
+
+        return self._index
+
+    @property
+    def index(self):
+        """Return the as-of index, building it on first use."""
+
+        if self._index is None:
+            self.build_index()
+
+        return self._index
+
+    def _lookup(self, t_codes, f_codes, dates):
+        """Return positions of the values known at ``dates``.
+
+        The latest period end available per (ticker, statement) is
+        resolved first and every field is then read from that period, so
+        a line item missing from the newest statement is reported as
+        missing instead of being filled from an older period.
+        """
+
+        index = self.index
+
+        if not len(index["keys"]):
+            empty = np.zeros(len(t_codes), dtype=np.int64)
+            return empty, empty.astype(bool)
+
+        days = _to_days(dates)
+
+        s_codes = np.where(
+            f_codes >= 0,
+            index["field_statements"][np.clip(f_codes, 0, None)],
+            -1
+        )
+        s_keys = (
+            t_codes.astype(np.int64) * len(index["statements"]) + s_codes
+        )
+
+        s_pos = np.searchsorted(
+            index["statement_composite"],
+            _composite(s_keys, days),
+            side="right"
+        ) - 1
+        s_safe = np.clip(s_pos, 0, None)
+        period = index["statement_periods"][s_safe]
+
+        keys = t_codes.astype(np.int64) * len(index["fields"]) + f_codes
+
+        pos = np.searchsorted(
+            index["composite"],
+            _composite(keys, period),
+            side="right"
+        ) - 1
+
+        # Step back over restatements of the period published after the
+        # query date.
+        while True:
+            safe = np.clip(pos, 0, None)
+            late = (
+                (pos >= 0)
+                & (index["keys"][safe] == keys)
+                & (index["periods"][safe] == period)
+                & (index["available"][safe] > days)
+            )
+
+            if not late.any():
+                break
+
+            pos = np.where(late, pos - 1, pos)
+
+        safe = np.clip(pos, 0, None)
+
+        valid = (
+            (t_codes >= 0)
+            & (f_codes >= 0)
+            & (s_pos >= 0)
+            & (index["statement_keys"][s_safe] == s_keys)
+            & (pos >= 0)
+            & (index["keys"][safe] == keys)
+            & (index["periods"][safe] == period)
+        )
+
+        return safe, valid
+
+    def asof(self, tickers, dates, field, statement="balance",
+             with_period_end=False):
+        """Vectorized as-of lookup of one field for (ticker, date) pairs.
+
+        Values come from the latest statement period available at each
+        date; a field absent from that period is NaN.
+
+        Args:
+            tickers: Sequence of ticker symbols.
+            dates: Sequence of query dates, same length as ``tickers``.
+            field: Statement line item, e.g. "Total Assets".
+            statement: Statement name the field belongs to.
+            with_period_end: Also return the period end of each value.
+
+        Returns:
+            numpy.ndarray: Latest available values (NaN when unknown), and
+            optionally the matching period ends.
+        """
+
+        index = self.index
+
+        tickers = np.asarray(tickers)
+        dates = pd.DatetimeIndex(dates)
+
+        if len(tickers) != len(dates):
+            raise ValueError("tickers and dates must have the same length")
+
+        t_codes = index["tickers"].get_indexer(tickers)
+
+        try:
+            f_code = index["fields"].get_loc((statement, field))
+        except KeyError:
+            f_code = -1
+
+        f_codes = np.full(len(tickers), f_code, dtype=np.int64)
+
+        pos, valid = self._lookup(t_codes, f_codes, dates)
+
+        values = np.full(len(tickers), np.nan)
+        values[valid] = index["values"][pos[valid]]
+
+        if not with_period_end:
+            return values
+
+        period_end = np.full(len(tickers), np.datetime64("NaT"), "M8[ns]")
+        period_end[valid] = index["period_end"][pos[valid]]
+
+        return values, period_end
+
+    def asof_frame(self, tickers, dates, fields, statement="balance"):
+        """Return several fields for (ticker, date) pairs as a dataframe."""
+
+        frame = pd.DataFrame(
+            {
+                field: self.asof(tickers, dates, field, statement)
+                for field in fields
+            },
+            index=pd.MultiIndex.from_arrays(
+                [np.asarray(tickers), pd.DatetimeIndex(dates)],
+                names=["Ticker", "Date"]
+            )
+        )
+
+        return frame
+
+    def snapshot(self, ticker, as_of, statement="balance"):
+        """Return every field of one statement known at ``as_of``.
+
+        Returns:
+            pandas.Series: Values indexed by field and named after their
+            period end, empty if nothing is available yet.
+        """
+
+        index = self.index
+        fields = index["fields"]
+
+        f_codes = np.flatnonzero(
+            fields.get_level_values("Statement") == statement
+        )
+
+        if not len(f_codes):
+            return pd.Series(dtype=float)
+
+        t_codes = np.full(
+            len(f_codes),
+            index["tickers"].get_indexer([ticker])[0]
+        )
+        dates = pd.DatetimeIndex([pd.Timestamp(as_of)] * len(f_codes))
+
+        pos, valid = self._lookup(t_codes, f_codes, dates)
+
+        period_end = (
+            pd.Timestamp(index["period_end"][pos[valid][0]])
+            if valid.any() else None
+        )
+
+        return pd.Series(
+            index["values"][pos[valid]],
+            index=fields.get_level_values("Field")[f_codes[valid]],
+            dtype=float,
+            name=period_end
+        )
+
+
+def _to_days(dates):
+    """Convert datetimes to integer days since the epoch."""
+    return (
+        pd.DatetimeIndex(dates)
+        .to_numpy()
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+
+
+def _composite(keys, days):
+    """Pack key codes and days into one sortable int64."""
+    return (keys << 32) + (days + 2**31)
@@ -1,14 +1,51 @@
+from libraries import np
+from model_cache import ModelCache
+
+
 class RiskModel:
     """Base class for risk models used to evaluate company creditworthiness."""
 
-    def __init__(self, companies):
+    Z_APPROVE = 3
+    PD_APPROVE = 5
+    Z_DENY = 1.8
+    PD_DENY = 20
+
+    def __init__(self, companies, cache=None):
         """Initialize the risk model with a company data mapping.
 
         Args:
             companies: Dictionary-like object containing company information.
+            cache: Optional ``ModelCache``. Defaults to the cache attached
+                to ``companies`` so outputs survive model re-creation.
         """
         self.companies = companies
-        self._ratio_cache = {}
+
+        if cache is None:
+            cache = getattr(companies, "model_cache", None)
+
+        if cache is None:
+            cache = ModelCache()
+
+        self._ratio_cache = cache
+
+    def _cached(self, kind, ticker, params, compute):
+        """Memoize a model output by ticker, parameters and data version.
+
+        Args:
+            kind: Output name, e.g. "ratios" or "pd".
+            ticker: Stock symbol the output belongs to.
+            params: Tuple of model parameters the output depends on.
+            compute: Zero-argument callable producing the output.
+        """
+
+        version = getattr(self.companies, "data_version", None)
+        key = (type(self).__name__, kind, ticker, params)
+
+        return self._ratio_cache.get_or_compute(key, compute, version)
+
+    def cache_stats(self):
+        """Return hit/miss counters of the model output cache."""
+        return self._ratio_cache.stats()
 
     def compute(self, ticker):
         """Compute model-specific risk outputs for a given ticker.
@@ -24,12 +61,15 @@ class RiskModel:
         )
 
     @staticmethod
-    def credit_decision(z_score, pd):
+    def credit_decision(z_score, pd, z_approve=None, z_deny=None):
         """Return a credit decision based on Z-Score and probability of default.
 
         Args:
             z_score: Altman Z-Score value.
             pd: Probability of default expressed as a percentage.
+            z_approve: Z-Score cutoff for approval; pass the safe cutoff
+                of the variant when the score is not the original Z.
+            z_deny: Z-Score cutoff for denial (variant distress cutoff).
 
         Returns:
             str: One of "Insufficient Data", "APPROVE", "DENY", or "REVIEW".
@@ -38,10 +78,51 @@ class RiskModel:
         if z_score is None or pd is None:
             return "Insufficient Data"
 
-        if z_score > 3 and pd < 5:
+        z_approve = RiskModel.Z_APPROVE if z_approve is None else z_approve
+        z_deny = RiskModel.Z_DENY if z_deny is None else z_deny
+
+        if z_score > z_approve and pd < RiskModel.PD_APPROVE:
             return "APPROVE"
 
-        if z_score < 1.8 or pd > 20:
+        if z_score < z_deny or pd > RiskModel.PD_DENY:
             return "DENY"
 
         return "REVIEW"
+
+    @staticmethod
+    def credit_decisions(z_scores, pds, z_approve=None, pd_approve=None,
+                         z_deny=None, pd_deny=None):
+        """Vectorized ``credit_decision`` with optional threshold overrides.
+
+        Args:
+            z_scores: Array-like of Altman Z-Score values.
+            pds: Array-like of probabilities of default in percent.
+            z_approve: Z-Score above which credit may be approved; a
+                scalar or one cutoff per score (e.g. from
+                ``Altman.zone_thresholds`` for mixed variants).
+            pd_approve: PD below which credit may be approved.
+            z_deny: Z-Score below which credit is denied, scalar or per
+                score.
+            pd_deny: PD above which credit is denied.
+
+        Returns:
+            numpy.ndarray: Decision labels aligned with the inputs.
+        """
+
+        z = np.asarray(z_scores, dtype=float)
+        p = np.asarray(pds, dtype=float)
+
+        z_approve = RiskModel.Z_APPROVE if z_approve is None else z_approve
+        pd_approve = RiskModel.PD_APPROVE if pd_approve is None else pd_approve
+        z_deny = RiskModel.Z_DENY if z_deny is None else z_deny
+        pd_deny = RiskModel.PD_DENY if pd_deny is None else pd_deny
+
+        return np.select(
+            [
+                np.isnan(z) | np.isnan(p),
+                (z > z_approve) & (p < pd_approve),
+                (z < z_deny) | (p > pd_deny),
+            ],
+            ["Insufficient Data", "APPROVE", "DENY"],
+            default="REVIEW"
+        )
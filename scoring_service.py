@@ -0,0 +1,407 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from libraries import np, pd
+from altman import Altman
+from merton import Merton
+from risk_models import RiskModel
+from financial_statements import Companies
+from data_processing import LocalProvider
+from instrumentation import PERF
+
+
+class ScoringEngine:
+    """Vectorized credit scoring over one warm, shared ``Companies`` cache."""
+
+    def __init__(self, companies, rf=0.03, T=1):
+        """Initialize the engine.
+
+        Args:
+            companies: ``Companies`` container covering the scorable universe.
+            rf: Risk-free rate used by the Merton model.
+            T: Merton horizon in years.
+        """
+
+        self.companies = companies
+        self.rf = rf
+        self.T = T
+
+        self._universe = set(companies.tickers)
+
+    def warm(self):
+        """Load prices, statements and market data into memory."""
+
+        with PERF.stage("service.warm"):
+            self.companies.prices
+            self.companies.log_returns
+            self.companies.balance_sheets
+            self.companies.income_statements
+            self.companies.market_data
+
+    def score(self, tickers):
+        """Score a batch of tickers in one vectorized pass.
+
+        Returns:
+            dict: Result dictionary per requested ticker.
+        """
+
+        known = [t for t in dict.fromkeys(tickers) if t in self._universe]
+
+        results = {}
+
+        if not known:
+            return self._unknown(tickers, results)
+
+        ratios = Altman(self.companies).ratios_matrix(known)
+        z = Altman.z_from_ratios(ratios) if not ratios.empty else None
+
+        inputs = Merton(self.companies, rf=self.rf).inputs_df(known)
+        inputs = inputs[(inputs["D"] > 0) & (inputs["sigma"] > 0)]
+
+        dd = Merton.dd_from_inputs(
+            inputs["V"].astype(float),
+            inputs["D"].astype(float),
+            inputs["sigma"].astype(float),
+            self.rf,
+            self.T
+        )
+        pd_default = pd.Series(Merton.pd_from_dd(dd), index=dd.index)
+
+        z = (
+            z.reindex(known) if z is not None
+            else dd.reindex(known) * np.nan
+        ).to_numpy(dtype=float)
+        dd = dd.reindex(known).to_numpy(dtype=float)
+        pd_default = pd_default.reindex(known).to_numpy(dtype=float)
+
+        decisions = RiskModel.credit_decisions(z, pd_default)
+
+        for i, t in enumerate(known):
+            results[t] = {
+                "ticker": t,
+                "z_score": _json_float(z[i]),
+                "distance_to_default": _json_float(dd[i]),
+                "probability_of_default": _json_float(pd_default[i]),
+                "decision": str(decisions[i]),
+            }
+
+        return self._unknown(tickers, results)
+
+    @staticmethod
+    def _unknown(tickers, results):
+        """Add an error result for every ticker outside the universe."""
+
+        for t in tickers:
+            if t not in results:
+                results[t] = {
+                    "ticker": t,
+                    "error": "Unknown ticker",
+                    "decision": "Insufficient Data",
+                }
+
+        return results
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-ticker requests into scoring batches.
+
+    A background worker waits for the first queued request, then keeps
+    collecting requests for up to ``max_wait_ms`` or until ``max_batch``
+    are queued, and scores them with one ``ScoringEngine.score`` call.
+    """
+
+    def __init__(self, engine, max_batch=256, max_wait_ms=5,
+                 latency_window=10000):
+        """Initialize the batcher and start its worker thread."""
+
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._requests = 0
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, ticker):
+        """Queue one ticker and return a ``Future`` for its result."""
+
+        future = Future()
+        self._queue.put((ticker.strip().upper(), future))
+
+        return future
+
+    def record_latency(self, seconds):
+        """Record the end-to-end latency of one request."""
+
+        with self._lock:
+            self._latencies.append(seconds)
+            self._requests += 1
+
+    def _run(self):
+        """Worker loop collecting and scoring micro-batches."""
+
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            tickers = [ticker for ticker, _ in batch]
+
+            try:
+                with PERF.stage("service.batch"):
+                    results = self.engine.score(tickers)
+
+                for ticker, future in batch:
+                    future.set_result(results[ticker])
+
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+            with self._lock:
+                self._batch_sizes.append(len(batch))
+
+    def stats(self):
+        """Return latency percentiles, queue depth and batch statistics."""
+
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            batch_sizes = np.array(self._batch_sizes)
+            requests = self._requests
+
+        stats = {
+            "requests": requests,
+            "queue_depth": self._queue.qsize(),
+            "batches": len(batch_sizes),
+            "mean_batch_size": (
+                float(batch_sizes.mean()) if len(batch_sizes) else 0.0
+            ),
+            "cache": self.engine.companies.model_cache.stats(),
+        }
+
+        for q in (50, 90, 99):
+            stats[f"latency_p{q}_ms"] = (
+                float(np.percentile(latencies, q)) if len(latencies) else None
+            )
+
+        return stats
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """HTTP/JSON front end for the ``MicroBatcher``.
+
+    Endpoints:
+        GET  /score?ticker=AZO             score one ticker
+        GET  /score?ticker=AZO&ticker=MA   score several tickers (list)
+        POST /score {"ticker": "AZO"}      score one ticker
+        POST /score {"tickers": [...]}     score tickers (always a list)
+        GET  /stats                        latency and queue statistics
+        GET  /health                       liveness probe
+    """
+
+    batcher = None
+    timeout = 30
+
+    def do_GET(self):
+        """Handle GET requests."""
+
+        url = urlparse(self.path)
+
+        if url.path == "/health":
+            return self._send(200, {"status": "ok"})
+
+        if url.path == "/stats":
+            return self._send(200, self.batcher.stats())
+
+        if url.path == "/score":
+            tickers = parse_qs(url.query).get("ticker", [])
+            return self._score(tickers, many=len(tickers) > 1)
+
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        """Handle POST requests."""
+
+        if urlparse(self.path).path != "/score":
+            return self._send(404, {"error": "Not found"})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "Invalid JSON"})
+
+        if not isinstance(body, dict):
+            return self._send(400, {"error": "Body must be a JSON object"})
+
+        many = "tickers" in body
+        tickers = body.get("tickers") if many else [body.get("ticker")]
+
+        if not isinstance(tickers, list):
+            return self._send(400, {"error": "tickers must be a list"})
+
+        self._score(tickers, many)
+
+    def _score(self, tickers, many=False):
+        """Submit tickers to the batcher and reply with their results.
+
+        The reply is a list when ``many`` is set and a single object
+        otherwise.
+        """
+
+        if not tickers:
+            return self._send(400, {"error": "Missing ticker"})
+
+        if not all(isinstance(t, str) and t.strip() for t in tickers):
+            return self._send(
+                400, {"error": "Tickers must be non-empty strings"}
+            )
+
+        start = time.perf_counter()
+
+        futures = [self.batcher.submit(t) for t in tickers]
+
+        try:
+            results = [f.result(timeout=self.timeout) for f in futures]
+        except Exception as e:
+            return self._send(500, {"error": str(e)})
+
+        self.batcher.record_latency(time.perf_counter() - start)
+
+        self._send(200, results if many else results[0])
+
+    def _send(self, status, payload):
+        """Write a JSON response."""
+
+        body = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Silence per-request access logs."""
+
+
+def create_server(companies, host="127.0.0.1", port=8000, rf=0.03, T=1,
+                  max_batch=256, max_wait_ms=5):
+    """Build a warm scoring server without starting it.
+
+    Returns:
+        tuple: The ``ThreadingHTTPServer`` and its ``MicroBatcher``.
+    """
+
+    engine = ScoringEngine(companies, rf=rf, T=T)
+    engine.warm()
+
+    batcher = MicroBatcher(engine, max_batch, max_wait_ms)
+
+    handler = type(
+        "BoundScoringHandler",
+        (ScoringHandler,),
+        {"batcher": batcher}
+    )
+
+    # The default listen backlog of 5 overflows under concurrent clients
+    # and makes them wait for a one second SYN retry.
+    server_class = type(
+        "ScoringServer",
+        (ThreadingHTTPServer,),
+        {"request_queue_size": 128}
+    )
+
+    return server_class((host, port), handler), batcher
+
+
+def main():
+    """Command line entry point for the local scoring service."""
+
+    parser = argparse.ArgumentParser(
+        description="Local credit scoring service"
+    )
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--interval", default="1y")
+    parser.add_argument("--rf", type=float, default=0.03)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        help="Model cache capacity (defaults to the universe size)"
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        help="Generate this many synthetic tickers into --data-dir first"
+    )
+
+    args = parser.parse_args()
+
+    provider = LocalProvider(args.data_dir)
+
+    if args.synthetic:
+        LocalProvider.generate_synthetic(args.data_dir, args.synthetic)
+
+    companies = Companies(
+        provider.tickers(),
+        args.interval,
+        provider,
+        cache_size=args.cache_size
+    )
+
+    server, _ = create_server(
+        companies,
+        args.host,
+        args.port,
+        rf=args.rf,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms
+    )
+
+    print(
+        f"Scoring {len(companies.tickers)} tickers on "
+        f"http://{args.host}:{args.port}"
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _json_float(x):
+    """Return ``x`` as a float, or None when it is not finite."""
+    return float(x) if np.isfinite(x) else None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,529 @@
+import argparse
+import csv
+import json
+import socket
+import time
+
+from libraries import np, pd
+from altman import Altman
+from merton import Merton
+from risk_models import RiskModel
+from financial_statements import Companies
+from data_processing import LocalProvider
+from visualization import Visualization
+from instrumentation import PERF
+
+
+class FileTickSource:
+    """Replayable tick source reading ``timestamp,ticker,price`` lines."""
+
+    def __init__(self, path):
+        """Initialize the source over a CSV file (header optional)."""
+        self.path = path
+
+    def __iter__(self):
+        """Yield (timestamp, ticker, price) tuples in file order."""
+
+        with open(self.path, newline="") as f:
+            yield from _parse_lines(f)
+
+    def batches(self, size=1000):
+        """Yield lists of at most ``size`` ticks."""
+        return _batched(iter(self), size)
+
+
+class SocketTickSource:
+    """Tick source reading ``timestamp,ticker,price`` lines from TCP."""
+
+    def __init__(self, host, port, max_wait=0.5):
+        """Initialize the source for a local socket server.
+
+        Args:
+            host: Server host.
+            port: Server port.
+            max_wait: Seconds a partial batch may wait for more ticks
+                before it is flushed, so a slow feed still raises alerts.
+        """
+        self.host = host
+        self.port = port
+        self.max_wait = max_wait
+
+    def __iter__(self):
+        """Yield ticks until the server closes the connection."""
+
+        with socket.create_connection((self.host, self.port)) as conn:
+            with conn.makefile("r", newline="") as f:
+                yield from _parse_lines(f)
+
+    def batches(self, size=1000):
+        """Yield lists of at most ``size`` ticks.
+
+        A batch is flushed when it is full, when no data arrives for
+        ``max_wait`` seconds, or at the latest ``max_wait`` seconds after
+        its first tick.
+        """
+
+        batch = []
+        buffer = b""
+        deadline = None
+
+        with socket.create_connection((self.host, self.port)) as conn:
+            conn.settimeout(self.max_wait)
+
+            while True:
+                try:
+                    chunk = conn.recv(65536)
+                except socket.timeout:
+                    chunk = None
+
+                if chunk == b"":
+                    break
+
+                if chunk:
+                    lines = (buffer + chunk).split(b"\n")
+                    buffer = lines.pop()
+
+                    if not batch:
+                        deadline = time.monotonic() + self.max_wait
+
+                    batch.extend(_parse_lines(
+                        line.decode(errors="replace").rstrip("\r")
+                        for line in lines
+                    ))
+
+                while len(batch) >= size:
+                    yield batch[:size]
+                    batch = batch[size:]
+                    deadline = time.monotonic() + self.max_wait
+
+                if batch and (
+                    chunk is None or time.monotonic() >= deadline
+                ):
+                    yield batch
+                    batch = []
+
+        batch.extend(_parse_lines([buffer.decode(errors="replace")]))
+
+        if batch:
+            yield batch
+
+
+class WatchlistMonitor:
+    """Incremental Z, DD and PD tracking with threshold-crossing events.
+
+    Fundamentals are fixed at start-up; each tick only moves market equity
+    and the rolling volatility. Volatility is kept as running sums over a
+    ring buffer of the last ``window`` daily log-returns per ticker, so a
+    tick costs O(1) instead of recomputing ``Merton.merton_df``.
+
+    The current day is one open bar: a tick rewrites that day's return
+    against the previous close, and the ring only rolls when a tick
+    carries a later date. Intraday tick noise therefore never displaces
+    the daily history.
+    """
+
+    def __init__(self, companies, window=252, rf=0.03, T=1):
+        """Initialize state from a ``Companies`` snapshot.
+
+        Args:
+            companies: Data container with prices and statements.
+            window: Number of daily returns in the volatility window.
+            rf: Risk-free rate used by the Merton model.
+            T: Merton horizon in years.
+        """
+
+        self.rf = rf
+        self.T = T
+        self.window = window
+        self.callbacks = []
+
+        altman = Altman(companies)
+        merton = Merton(companies, rf=rf)
+
+        ratios = altman.ratios_matrix()
+        inputs = merton.inputs_df()
+        inputs = inputs[inputs["D"] > 0]
+
+        tickers = ratios.index.intersection(inputs.index)
+        tickers = [t for t in companies.tickers if t in tickers]
+
+        self.tickers = pd.Index(tickers)
+        n = len(tickers)
+
+        ratios = ratios.loc[tickers]
+        inputs = inputs.loc[tickers]
+
+        w = Altman.WEIGHTS
+        self._z_static = (
+            w["X1"] * ratios["X1"] + w["X2"] * ratios["X2"]
+            + w["X3"] * ratios["X3"] + w["X5"] * ratios["X5"]
+        ).to_numpy(dtype=float)
+
+        self._equity0 = np.array(
+            [companies.market_equity(t) for t in tickers], dtype=float
+        )
+        self._liabilities = np.array(
+            [companies.total_liabilities(t) for t in tickers], dtype=float
+        )
+        self._debt = inputs["D"].to_numpy(dtype=float)
+
+        prices = companies.prices.reindex(columns=tickers).ffill()
+        self._price0 = prices.iloc[-1].to_numpy(dtype=float)
+        self._last = self._price0.copy()
+
+        last_day = pd.Timestamp(prices.index[-1])
+        if last_day.tzinfo is not None:
+            last_day = last_day.tz_localize(None)
+        self._day = np.full(n, _to_days([last_day])[0])
+
+        returns = companies.log_returns.reindex(columns=tickers)
+
+        self._buffer = np.full((window, n), np.nan)
+        for i, t in enumerate(tickers):
+            tail = returns[t].dropna().to_numpy()[-window:]
+            self._buffer[:len(tail), i] = tail
+
+        self._count = np.zeros(n)
+        self._sum = np.zeros(n)
+        self._sumsq = np.zeros(n)
+        self._resync(np.arange(n))
+
+        # The newest historical return is the open bar of the last day;
+        # the previous close is recovered from it.
+        self._open = ((self._count - 1) % window).astype(np.int64)
+        last_return = self._buffer[self._open, np.arange(n)]
+        self._prev_close = self._last / np.exp(
+            np.where(np.isnan(last_return), 0.0, last_return)
+        )
+
+        self._state = self._evaluate(np.arange(n))
+
+    def _resync(self, idx):
+        """Recompute running sums exactly for ``idx`` (drift control)."""
+
+        buf = self._buffer[:, idx]
+        valid = ~np.isnan(buf)
+
+        self._count[idx] = valid.sum(axis=0)
+        self._sum[idx] = np.where(valid, buf, 0).sum(axis=0)
+        self._sumsq[idx] = np.where(valid, buf**2, 0).sum(axis=0)
+
+    @property
+    def state(self):
+        """Return the current values of every tracked ticker."""
+        return pd.DataFrame(self._state, index=self.tickers)
+
+    def _evaluate(self, idx):
+        """Return Z, DD, PD, zones and decisions for ticker positions."""
+
+        equity = self._equity0[idx] * self._last[idx] / self._price0[idx]
+        debt = self._debt[idx]
+
+        n = self._count[idx]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = (self._sumsq[idx] - self._sum[idx]**2 / n) / (n - 1)
+            sigma = np.sqrt(np.clip(var, 0, None) * 252)
+            sigma = np.where(sigma > 0, sigma, np.nan)
+
+            z = (
+                self._z_static[idx]
+                + Altman.WEIGHTS["X4"] * equity / self._liabilities[idx]
+            )
+            dd = Merton.dd_from_inputs(
+                equity + debt, debt, sigma, self.rf, self.T
+            )
+
+        pd_default = np.where(np.isnan(dd), np.nan, Merton.pd_from_dd(dd))
+
+        return {
+            "Price": self._last[idx],
+            "Volatility": sigma,
+            "Z-Score": z,
+            "Distance to Default": dd,
+            "Probability of Default": pd_default,
+            "Z Zone": Visualization.zones("Z-Score", z),
+            "DD Zone": Visualization.zones("Distance to Default", dd),
+            "Decision": RiskModel.credit_decisions(z, pd_default),
+        }
+
+    def on_event(self, callback):
+        """Register a callable invoked with every transition event."""
+        self.callbacks.append(callback)
+
+    def _update(self, idx, prices, days):
+        """Apply one price per ticker position (positions are unique).
+
+        A tick on a later day closes the open bar at the last price and
+        rolls the ring; otherwise it rewrites the open bar in place.
+        """
+
+        new_day = days > self._day[idx]
+
+        self._prev_close[idx] = np.where(
+            new_day, self._last[idx], self._prev_close[idx]
+        )
+        self._open[idx] = np.where(
+            new_day, (self._open[idx] + 1) % self.window, self._open[idx]
+        )
+        self._day[idx] = np.maximum(self._day[idx], days)
+
+        r = np.log(prices / self._prev_close[idx])
+        self._last[idx] = prices
+
+        pos = self._open[idx]
+        old = self._buffer[pos, idx]
+        had_old = ~np.isnan(old)
+        old = np.where(had_old, old, 0.0)
+
+        self._sum[idx] += r - old
+        self._sumsq[idx] += r**2 - old**2
+        self._count[idx] += ~had_old
+
+        self._buffer[pos, idx] = r
+
+        wrapped = idx[new_day & (pos == 0)]
+        if len(wrapped):
+            self._resync(wrapped)
+
+    def process(self, ticks):
+        """Apply a batch of ticks and return the transition events.
+
+        Args:
+            ticks: Iterable of (timestamp, ticker, price) tuples. Ticks for
+                the same ticker are applied in order.
+
+        Returns:
+            list of dict: One event per Z-zone, DD-zone or decision change.
+        """
+
+        ticks = list(ticks)
+
+        if not ticks:
+            return []
+
+        timestamps, tickers, prices = zip(*ticks)
+
+        codes = self.tickers.get_indexer(tickers)
+        prices = np.asarray(prices, dtype=float)
+        timestamps = np.asarray(timestamps, dtype=object)
+
+        keep = (codes >= 0) & (prices > 0)
+        codes, prices = codes[keep], prices[keep]
+        timestamps = timestamps[keep]
+
+        # Unparseable timestamps count as the ticker's current day.
+        days = _to_days(timestamps)
+
+        # Split the batch into rounds in which every ticker appears at most
+        # once, so each round is one vectorized update.
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+        occurrence = np.empty(len(codes), dtype=np.int64)
+        occurrence[order] = np.arange(len(codes)) - group_start
+
+        events = []
+        columns = ["Z Zone", "DD Zone", "Decision"]
+        kinds = ["z_zone", "dd_zone", "decision"]
+
+        with PERF.stage("streaming.process"):
+
+            for k in range(occurrence.max() + 1 if len(codes) else 0):
+
+                sel = occurrence == k
+                idx = codes[sel]
+
+                self._update(
+                    idx,
+                    prices[sel],
+                    np.where(days[sel] < 0, self._day[idx], days[sel])
+                )
+
+                new = self._evaluate(idx)
+                old = {c: self._state[c][idx] for c in columns}
+
+                for column, kind in zip(columns, kinds):
+                    changed = np.flatnonzero(new[column] != old[column])
+
+                    for j in changed:
+                        events.append({
+                            "timestamp": timestamps[sel][j],
+                            "ticker": self.tickers[idx[j]],
+                            "event": kind,
+                            "from": str(old[column][j]),
+                            "to": str(new[column][j]),
+                            "price": float(new["Price"][j]),
+                            "z_score": float(new["Z-Score"][j]),
+                            "distance_to_default": float(
+                                new["Distance to Default"][j]
+                            ),
+                            "probability_of_default": float(
+                                new["Probability of Default"][j]
+                            ),
+                        })
+
+                for column, value in new.items():
+                    self._state[column][idx] = value
+
+        PERF.count("streaming.ticks", len(codes))
+        PERF.count("streaming.events", len(events))
+
+        for event in events:
+            for callback in self.callbacks:
+                callback(event)
+
+        return events
+
+    def run(self, source, batch_size=1000):
+        """Consume a tick source and yield events as they occur."""
+
+        for batch in source.batches(batch_size):
+            yield from self.process(batch)
+
+
+def simulate_ticks(companies, path, n_ticks=100000, days=5, seed=0):
+    """Write a replayable random-walk tick file for ``companies``.
+
+    Ticks are spread evenly over ``days`` trading days after the last
+    price. Each tick moves one random ticker by an intraday shock scaled
+    so that a day's ticks add up to that ticker's historical daily
+    volatility.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    prices = companies.prices.ffill()
+    last = prices.iloc[-1].dropna()
+    vol = companies.log_returns[last.index].std().fillna(0.02).to_numpy()
+
+    tickers = last.index.to_numpy()
+    level = last.to_numpy(dtype=float)
+
+    pick = rng.integers(0, len(tickers), n_ticks)
+    ticks_per_day = max(n_ticks / (days * len(tickers)), 1)
+    shocks = rng.normal(0, 1, n_ticks) * vol[pick] / np.sqrt(ticks_per_day)
+
+    start = pd.Timestamp(prices.index[-1])
+    if start.tzinfo is not None:
+        start = start.tz_localize(None)
+
+    sessions = pd.bdate_range(
+        start.normalize() + pd.Timedelta(days=1), periods=days
+    )
+    per_day = -(-n_ticks // days)
+    step = pd.Timedelta(hours=6.5) / per_day
+
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "ticker", "price"])
+
+        for k in range(n_ticks):
+            i = pick[k]
+            level[i] *= np.exp(shocks[k])
+
+            day, slot = divmod(k, per_day)
+            timestamp = (
+                sessions[day] + pd.Timedelta(hours=9.5) + slot * step
+            )
+
+            writer.writerow([
+                timestamp.isoformat(),
+                tickers[i],
+                f"{level[i]:.6f}",
+            ])
+
+
+def _parse_lines(lines):
+    """Parse ``timestamp,ticker,price`` rows, skipping headers and junk."""
+
+    for row in csv.reader(lines):
+
+        if len(row) < 3:
+            continue
+
+        try:
+            price = float(row[2])
+        except ValueError:
+            continue
+
+        yield row[0], row[1].strip().upper(), price
+
+
+def _to_days(timestamps):
+    """Convert timestamps to integer days; unparseable ones are negative."""
+
+    dates = pd.to_datetime(
+        pd.Series(np.asarray(timestamps, dtype=object)),
+        errors="coerce",
+        utc=True,
+        format="mixed"
+    )
+
+    days = (
+        dates.dt.tz_localize(None)
+        .to_numpy()
+        .astype("datetime64[D]")
+        .astype(np.int64)
+    )
+
+    return np.where(dates.isna().to_numpy(), -1, days)
+
+
+def _batched(iterator, size):
+    """Group an iterator into lists of at most ``size`` items."""
+
+    batch = []
+
+    for item in iterator:
+        batch.append(item)
+
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def main():
+    """Command line entry point printing events as JSON lines."""
+
+    parser = argparse.ArgumentParser(
+        description="Streaming watchlist monitor"
+    )
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--interval", default="1y")
+    parser.add_argument("--ticks", help="Replay file of ticks")
+    parser.add_argument("--socket", help="host:port tick server")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--max-wait",
+        type=float,
+        default=0.5,
+        help="Seconds before a partial socket batch is processed"
+    )
+    parser.add_argument("--window", type=int, default=252)
+
+    args = parser.parse_args()
+
+    provider = LocalProvider(args.data_dir)
+    companies = Companies(provider.tickers(), args.interval, provider)
+
+    if args.socket:
+        host, port = args.socket.rsplit(":", 1)
+        source = SocketTickSource(host, int(port), args.max_wait)
+    elif args.ticks:
+        source = FileTickSource(args.ticks)
+    else:
+        parser.error("one of --ticks or --socket is required")
+
+    monitor = WatchlistMonitor(companies, window=args.window)
+
+    for event in monitor.run(source, args.batch_size):
+        print(json.dumps(event, default=str), flush=True)
+
+
+if __name__ == "__main__":
+    main()
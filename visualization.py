@@ -1,5 +1,8 @@
-from libraries import px, go, st
+from libraries import px, go, st, pd, np
+from plotly.subplots import make_subplots
 from risk_models import RiskModel
+from altman import Altman
+from instrumentation import PERF
 
 
 class Visualization:
@@ -13,12 +16,38 @@ class Visualization:
     visualization and display formatting.
     """
 
-    def __init__(self):
+    LARGE_UNIVERSE_ROWS = 200
+    TOP_N = 15
+    PAGE_SIZE = 50
+    HISTOGRAM_BINS = 40
+    ECDF_POINTS = 200
+
+    ZONE_COLORS = {
+        "Unsafe": "#dc2626",
+        "Grey": "#9ca3af",
+        "Safe": "#16a34a"
+    }
+
+    # (grey threshold, safe threshold, higher is safer, inclusive bounds)
+    ZONES = {
+        "Z-Score": (1.8, 3, True, False),
+        "Distance to Default": (1.5, 3, True, True),
+        "Probability of Default": (15, 5, False, False),
+    }
+
+    def __init__(self, distribution="histogram"):
         """
         Initializes visualization configuration used
         across all Plotly charts.
+
+        Parameters
+        ----------
+        distribution : str
+            Distribution view used for large universes,
+            "histogram" or "ecdf".
         """
         self.template = "plotly_dark"
+        self.distribution = distribution
 
     @staticmethod
     def format_merton_table(merton_df):
@@ -55,7 +84,7 @@ class Visualization:
         return df
 
     @staticmethod
-    def build_credit_table(z_df, merton_df):
+    def build_credit_table(z_df, merton_df, formatted=True):
         """
         Combines Altman Z-Score and Merton outputs to generate
         a unified credit risk assessment table.
@@ -69,23 +98,53 @@ class Visualization:
             Altman Z-score results.
         merton_df : pandas.DataFrame
             Merton model results.
+        formatted : bool
+            Render numeric columns as display strings.
 
         Returns
         -------
         pandas.DataFrame
-            Combined and formatted credit decision table.
+            Combined credit decision table.
         """
 
         df = z_df.join(merton_df, how="inner")
 
-        df["Decision"] = df.apply(
-            lambda row: RiskModel.credit_decision(
-                row["Z-Score"],
-                row["Probability of Default"]
-            ),
-            axis=1
+        z_deny, z_approve = (
+            Altman.zone_thresholds(df["Variant"]) if "Variant" in df
+            else (None, None)
+        )
+
+        df["Decision"] = RiskModel.credit_decisions(
+            df["Z-Score"],
+            df["Probability of Default"],
+            z_approve=z_approve,
+            z_deny=z_deny
         )
 
+        if formatted:
+            df = Visualization.format_credit_table(df)
+
+        return df.reset_index()
+
+    @staticmethod
+    def format_credit_table(df):
+        """
+        Formats numeric credit table columns for display.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Raw credit decision table.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Copy with Z-Score, Distance to Default and
+            Probability of Default rendered as strings.
+        """
+
+        df = df.copy()
+
         df["Z-Score"] = df["Z-Score"].map(lambda x: f"{x:.2f}")
         df["Distance to Default"] = df[
             "Distance to Default"
@@ -96,32 +155,256 @@ class Visualization:
             lambda x: "<0.01%" if x < 0.01 else f"{x:.2f}%"
         )
 
-        return df.reset_index()
+        return df
 
     @staticmethod
-    def plot_altman(z_df):
+    def filter_credit_table(df, sort_by="Probability of Default",
+                            ascending=False, decisions=None, search=""):
+        """
+        Server-side filtering and sorting of the raw credit table,
+        so only the visible page is sent to the browser.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Raw (unformatted) credit decision table.
+        sort_by : str
+            Column used for ordering.
+        ascending : bool
+            Sort direction.
+        decisions : list of str, optional
+            Decisions to keep; all when empty.
+        search : str
+            Case-insensitive ticker substring filter.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Filtered and sorted table.
         """
-        Creates an interactive bar chart displaying Altman Z-Scores.
+
+        view = df
+
+        if decisions:
+            view = view[view["Decision"].isin(decisions)]
+
+        if search:
+            view = view[
+                view["Ticker"].str.contains(
+                    search.strip().upper(),
+                    regex=False
+                )
+            ]
+
+        if sort_by:
+            view = view.sort_values(
+                sort_by,
+                ascending=ascending,
+                na_position="last",
+                kind="mergesort"
+            )
+
+        return view
+
+    @classmethod
+    def zones(cls, column, values):
+        """
+        Classifies values of a model output into risk zones.
+
+        Parameters
+        ----------
+        column : str
+            One of the keys of ``ZONES``.
+        values : array-like
+            Model outputs.
+
+        Returns
+        -------
+        numpy.ndarray
+            "Unsafe", "Grey" or "Safe" per value, None where the
+            value is missing.
+        """
+
+        grey, safe, higher_is_safer, inclusive = cls.ZONES[column]
+        v = np.asarray(values, dtype=float)
+
+        if higher_is_safer:
+            below = np.less_equal if inclusive else np.less
+            unsafe, mid = below(v, grey), below(v, safe)
+        else:
+            unsafe, mid = v > grey, v > safe
+
+        return np.select(
+            [unsafe, mid, ~np.isnan(v)],
+            ["Unsafe", "Grey", "Safe"],
+            default=None
+        )
+
+    def _large_universe_figure(self, df, column, title):
+        """
+        Builds a bounded-size view of one model output for
+        large universes: a server-side distribution (histogram
+        or ECDF) with zone shading next to the worst and best
+        ``TOP_N`` companies.
+        """
+
+        grey, safe, higher_is_safer, _ = self.ZONES[column]
+
+        # Scores of mixed Altman variants carry their own zones; shade the
+        # distribution only when a single variant's cutoffs apply.
+        variants = df["Variant"].unique() if "Variant" in df else []
+        shade = len(variants) <= 1
+
+        if len(variants) == 1:
+            grey, safe = Altman.ZONES.loc[variants[0]]
+
+        series = df[column].dropna()
+        values = series.to_numpy(dtype=float)
+        values = values[np.isfinite(values)]
+
+        lo, hi = np.percentile(values, [1, 99]) if len(values) else (0, 1)
+        if lo == hi:
+            hi = lo + 1
+
+        n = self.TOP_N
+
+        fig = make_subplots(
+            rows=1,
+            cols=2,
+            column_widths=[0.6, 0.4],
+            horizontal_spacing=0.12,
+            subplot_titles=(
+                f"Distribution ({len(values)} companies)",
+                f"Worst {n} / Best {n}"
+            )
+        )
+
+        if self.distribution == "ecdf":
+            probs = np.linspace(0, 1, self.ECDF_POINTS)
+            fig.add_trace(
+                go.Scatter(
+                    x=np.quantile(values, probs) if len(values) else [],
+                    y=probs,
+                    mode="lines",
+                    line_color="#60a5fa",
+                    showlegend=False
+                ),
+                row=1,
+                col=1
+            )
+        else:
+            counts, edges = np.histogram(
+                np.clip(values, lo, hi),
+                bins=self.HISTOGRAM_BINS,
+                range=(lo, hi)
+            )
+            fig.add_trace(
+                go.Bar(
+                    x=(edges[:-1] + edges[1:]) / 2,
+                    y=counts,
+                    width=np.diff(edges),
+                    marker_color="#60a5fa",
+                    showlegend=False
+                ),
+                row=1,
+                col=1
+            )
+
+        low, high = sorted((grey, safe))
+        low_zone, high_zone = (
+            ("Unsafe", "Safe") if higher_is_safer else ("Safe", "Unsafe")
+        )
+
+        for x0, x1, zone in [
+            (lo, low, low_zone),
+            (low, high, "Grey"),
+            (high, hi, high_zone),
+        ] if shade else []:
+            x0, x1 = max(x0, lo), min(x1, hi)
+
+            if x0 < x1:
+                fig.add_vrect(
+                    x0=x0,
+                    x1=x1,
+                    fillcolor=self.ZONE_COLORS[zone],
+                    opacity=0.15,
+                    line_width=0,
+                    row=1,
+                    col=1
+                )
+
+        ordered = series.sort_values(ascending=higher_is_safer)
+
+        if len(ordered) > 2 * n:
+            ordered = pd.concat([ordered.head(n), ordered.tail(n)])
+
+        fig.add_trace(
+            go.Bar(
+                x=ordered.to_numpy(),
+                y=ordered.index.astype(str),
+                orientation="h",
+                marker_color=[
+                    self.ZONE_COLORS[z]
+                    for z in (
+                        df.loc[ordered.index, "Zone"] if "Zone" in df
+                        else self.zones(column, ordered)
+                    )
+                ],
+                showlegend=False
+            ),
+            row=1,
+            col=2
+        )
+
+        fig.update_yaxes(autorange="reversed", row=1, col=2)
+
+        fig.update_layout(
+            template=self.template,
+            title=title,
+            height=max(450, 18 * len(ordered))
+        )
+
+        return fig
+
+    @PERF.timed("visualization.altman_figure")
+    def altman_figure(self, z_df):
+        """
+        Builds an interactive bar chart displaying Altman Z-Scores.
 
         Companies are colored according to financial distress zones:
-        Unsafe (<1.8), Grey (1.8–3), and Safe (>3).
+        Unsafe (<1.8), Grey (1.8–3), and Safe (>3), or by the
+        "Zone" column of mixed-variant scores, whose cutoff lines are
+        only drawn when every row uses the same variant. Above
+        ``LARGE_UNIVERSE_ROWS`` companies a distribution and
+        worst/best view is returned instead.
 
         Parameters
         ----------
         z_df : pandas.DataFrame
             Altman Z-score results.
+
+        Returns
+        -------
+        plotly.graph_objects.Figure
+            Bar chart ready to render.
         """
 
+        if len(z_df) > self.LARGE_UNIVERSE_ROWS:
+            return self._large_universe_figure(
+                z_df, "Z-Score", "Altman Z-Score"
+            )
+
         df = z_df.reset_index()
 
-        def risk_zone(z):
-            if z < 1.8:
-                return "Unsafe"
-            elif z < 3:
-                return "Grey"
-            return "Safe"
+        # Mixed Altman variants are not on one scale, so cutoff lines are
+        # only drawn when a single variant applies.
+        variants = df["Variant"].unique() if "Variant" in df else ["Z"]
+        cutoffs = (
+            Altman.ZONES.loc[variants[0]] if len(variants) == 1 else None
+        )
 
-        df["Zone"] = df["Z-Score"].apply(risk_zone)
+        if "Zone" not in df:
+            df["Zone"] = Altman.score_zones(df["Z-Score"], ["Z"] * len(df))
 
         color_map = {
             "Unsafe": "#dc2626",
@@ -139,8 +422,13 @@ class Visualization:
             title="Altman Z-Score"
         )
 
-        fig.add_hline(y=1.8, line_dash="dash", line_color="red")
-        fig.add_hline(y=3, line_dash="dash", line_color="green")
+        if cutoffs is not None:
+            fig.add_hline(
+                y=cutoffs["Distress"], line_dash="dash", line_color="red"
+            )
+            fig.add_hline(
+                y=cutoffs["Safe"], line_dash="dash", line_color="green"
+            )
 
         fig.update_traces(texttemplate="%{text:.2f}")
 
@@ -150,13 +438,19 @@ class Visualization:
             yaxis_title="Z Score"
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
 
-    def plot_merton_dd(self, merton_df):
+    @PERF.timed("visualization.merton_dd_figure")
+    def merton_dd_figure(self, merton_df):
         """
-        Displays Distance to Default with risk zones.
+        Builds the Distance to Default chart with risk zones.
         """
 
+        if len(merton_df) > self.LARGE_UNIVERSE_ROWS:
+            return self._large_universe_figure(
+                merton_df, "Distance to Default", "Distance to Default"
+            )
+
         df = merton_df.reset_index()
 
         def dd_zone(dd):
@@ -190,13 +484,21 @@ class Visualization:
 
         fig.update_traces(texttemplate="%{text:.2f}")
 
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
 
-    def plot_pd(self, merton_df):
+    @PERF.timed("visualization.pd_figure")
+    def pd_figure(self, merton_df):
         """
-        Displays Probability of Default with risk zones.
+        Builds the Probability of Default chart with risk zones.
         """
 
+        if len(merton_df) > self.LARGE_UNIVERSE_ROWS:
+            return self._large_universe_figure(
+                merton_df,
+                "Probability of Default",
+                "Probability of Default (%)"
+            )
+
         df = merton_df.reset_index()
 
         def pd_zone(pd):
@@ -233,12 +535,13 @@ class Visualization:
             hovertemplate="PD: %{y:.2f}%"
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
 
     @staticmethod
-    def plot_credit_table(df):
+    @PERF.timed("visualization.credit_table_figure")
+    def credit_table_figure(df):
         """
-        Displays the final credit decision table using
+        Builds the final credit decision table as
         a Plotly interactive table.
 
         Decision outcomes are color-coded:
@@ -248,6 +551,11 @@ class Visualization:
         ----------
         df : pandas.DataFrame
             Credit decision dataframe.
+
+        Returns
+        -------
+        plotly.graph_objects.Figure
+            Table figure ready to render.
         """
 
         decision_colors = []
@@ -291,4 +599,161 @@ class Visualization:
             height=350
         )
 
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        return fig
+
+    @staticmethod
+    @PERF.timed("visualization.show")
+    def show(fig):
+        """
+        Renders a prebuilt Plotly figure in the dashboard.
+
+        Parameters
+        ----------
+        fig : plotly.graph_objects.Figure
+            Figure returned by one of the ``*_figure`` builders.
+        """
+
+        st.plotly_chart(fig, use_container_width=True)
+
+    def plot_altman(self, z_df):
+        """
+        Displays the Altman Z-Score chart.
+        """
+        self.show(self.altman_figure(z_df))
+
+    def plot_merton_dd(self, merton_df):
+        """
+        Displays Distance to Default with risk zones.
+        """
+        self.show(self.merton_dd_figure(merton_df))
+
+    def plot_pd(self, merton_df):
+        """
+        Displays Probability of Default with risk zones.
+        """
+        self.show(self.pd_figure(merton_df))
+
+    def plot_credit_table(self, df):
+        """
+        Displays the final credit decision table.
+        """
+        self.show(self.credit_table_figure(df))
+
+    @staticmethod
+    def summary_table(df):
+        """
+        Returns descriptive statistics of numeric columns, used
+        instead of full tables for large universes.
+        """
+        return df.select_dtypes("number").describe(
+            percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]
+        ).T
+
+    def plot_credit_table_paged(self, df, key="credit"):
+        """
+        Displays the credit decision table one page at a time
+        with server-side sorting, decision filter and ticker
+        search. Only the visible page is sent to the browser.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Raw credit table from ``build_credit_table(...,
+            formatted=False)``.
+        key : str
+            Prefix for widget keys.
+        """
+
+        col1, col2, col3, col4, col5 = st.columns([2, 1, 2, 2, 1])
+
+        with col1:
+            sort_by = st.selectbox(
+                "Sort by",
+                [
+                    "Probability of Default",
+                    "Z-Score",
+                    "Distance to Default",
+                    "Ticker"
+                ],
+                key=f"{key}_sort"
+            )
+
+        with col2:
+            ascending = st.toggle("Ascending", key=f"{key}_asc")
+
+        with col3:
+            decisions = st.multiselect(
+                "Decision",
+                ["APPROVE", "REVIEW", "DENY"],
+                key=f"{key}_decisions"
+            )
+
+        with col4:
+            search = st.text_input("Ticker", key=f"{key}_search")
+
+        view = self.filter_credit_table(
+            df, sort_by, ascending, decisions, search
+        )
+
+        n_pages = max(1, -(-len(view) // self.PAGE_SIZE))
+
+        with col5:
+            page = st.number_input(
+                "Page",
+                min_value=1,
+                max_value=n_pages,
+                value=1,
+                key=f"{key}_page"
+            )
+
+        start = (page - 1) * self.PAGE_SIZE
+        page_df = view.iloc[start:start + self.PAGE_SIZE]
+
+        st.caption(
+            f"{len(view)} of {len(df)} companies · "
+            f"page {page} of {n_pages}"
+        )
+
+        self.show(self.credit_table_figure(
+            self.format_credit_table(page_df)
+        ))
+
+    @staticmethod
+    def plot_performance(report):
+        """
+        Displays stage timings, remote call counters and cache
+        hit rates inside a collapsible "Performance" panel.
+
+        Parameters
+        ----------
+        report : dict
+            Output of ``Instrumentation.report()``.
+        """
+
+        with st.expander("Performance", expanded=False):
+
+            stages = pd.DataFrame(report["stages"]).T
+
+            if not stages.empty:
+                st.markdown("**Stages**")
+                st.dataframe(stages, use_container_width=True)
+
+            tickers = pd.DataFrame(report["tickers"]).T
+
+            if not tickers.empty:
+                st.markdown("**Per ticker (seconds)**")
+                st.dataframe(tickers, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.markdown("**Remote calls**")
+                st.json(report["counters"])
+
+            with col2:
+                st.markdown("**Caches (shared by all sessions)**")
+                st.json(report["caches"])
+
+            if "profile" in report:
+                st.markdown("**Profile**")
+                st.code(report["profile"])